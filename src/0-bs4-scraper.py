@@ -1,143 +1,101 @@
+import argparse
+from collections.abc import Iterable
+from collections.abc import Iterator
 from dataclasses import asdict
+from itertools import batched
 from pprint import pprint
-from typing import Any
-
-import requests
-from bs4 import BeautifulSoup
 
+from archive import DEFAULT_ARCHIVE_DIR
+from archive import HtmlArchive
+from archive import reparse
+from fetcher import Fetcher
+from load_django import Fingerprint
 from load_django import ProductData
-from load_django import clean_value
-from load_django import save_product
+from load_django import load_fingerprints
+from load_django import save_products
+from pipeline import FetchedPage
+from pipeline import Pipeline
 
 URL = 'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_16_Pro_Max_256GB_Black_Titanium-p1145443.html'
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:133.0) Gecko/20100101 Firefox/133.0',
-    'Accept-Language': 'en-US,en;q=0.9',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-    'Referer': 'https://www.google.com/',
-    'Connection': 'keep-alive',
-    'Cache-Control': 'no-cache',
-    'Pragma': 'no-cache',
-    'Upgrade-Insecure-Requests': '1',
-    'DNT': '1',  # Do Not Track
-    'Sec-Fetch-Dest': 'document',
-    'Sec-Fetch-Mode': 'navigate',
-    'Sec-Fetch-Site': 'same-origin',
-    'Sec-Fetch-User': '?1',
-    'TE': 'Trailers',  # Transfer Encoding
-}
 
+class ConditionalUrls:
+    """Feeds urls to the fetcher, loading stored validators one chunk at a time just before the urls are sent."""
 
-def get_page_content(url: str) -> str:
-    response = requests.get(url, headers=headers)
-    return response.text
+    def __init__(self, urls: Iterable[str], chunk_size: int = 1000) -> None:
+        self.urls = urls
+        self.chunk_size = chunk_size
+        self.validators: dict[str, tuple[str | None, str | None]] = {}
 
+    def __iter__(self) -> Iterator[str]:
+        for chunk in batched(self.urls, self.chunk_size):
+            for url, fp in load_fingerprints(chunk).items():
+                self.validators[url] = (fp.etag, fp.last_modified)
+            yield from chunk
 
-def get_char_value(tag: Any, section_name: str, char_name: str) -> str | None:
-    if char_header := tag.find('h3', string=section_name):
-        if attr_name := char_header.parent.find('span', string=char_name):
-            return attr_name.parent.find_all('span')[1].text.strip()
-    return None
 
+def get_page_content(urls: Iterable[str], fetcher: Fetcher, archive: HtmlArchive) -> Iterator[FetchedPage]:
+    conditional = ConditionalUrls(urls)
+    for result in fetcher.fetch_all(conditional, conditional.validators):
+        conditional.validators.pop(result.url, None)
+        if result.ok:
+            archive.put(result.url, result.text)
+            yield FetchedPage(result.url, result.text, Fingerprint(result.etag, result.last_modified))
+        elif not result.not_modified:
+            print(f'Failed to fetch {result.url}: {result.error or result.status}\n')
 
-def main() -> None:
-    html_doc = get_page_content(URL)
-    soup = BeautifulSoup(html_doc, 'lxml')
-    char_section = soup.find('div', attrs={'data-section': 'characteristics'})
-
-    product = ProductData()
-
-    try:
-        # div[@data-section='top']//h1
-        product.title = soup.find('div', attrs={'data-section': 'top'}).find('h1').text.strip()
-    except AttributeError:
-        pass
-
-    try:
-        product.color = get_char_value(char_section, 'Фізичні характеристики', 'Колір')
-    except AttributeError:
-        pass
-
-    try:
-        product.ssd = get_char_value(char_section, "Функції пам'яті", "Вбудована пам'ять")
-    except AttributeError:
-        pass
-
-    try:
-        product.manufacturer = get_char_value(char_section, 'Інші', 'Виробник')
-    except AttributeError:
-        pass
-
-    try:
-        # //div[@class='br-pr-price main-price-block']//div[@class='price-wrapper']/span
-        product.price = int(
-            soup.find('div', class_='br-pr-price main-price-block')
-            .find('div', class_='price-wrapper')
-            .find('span')
-            .text.strip()
-            .replace(' ', '')
-        )
-    except AttributeError:
-        pass
-
-    try:
-        # //div[@class='product-block-bottom']//img
-        images = soup.find('div', class_='product-block-bottom').find_all('img')
-        product.images = [img.get('src') for img in images]  # TODO: select only large size
-    except AttributeError:
-        pass
-
-    try:
-        # //div[@data-section='top']//div[@id='product_code']//span[@class='br-pr-code-val']
-        product.code = (
-            soup.find('div', attrs={'data-section': 'top'})
-            .find('div', id='product_code')
-            .find('span', class_='br-pr-code-val')
-            .text.strip()
-        )
-    except AttributeError:
-        pass
-
-    try:
-        # //div[@id='fast-navigation-block-static']//a[@class='scroll-to-element reviews-count']/span
-        product.num_reviews = int(
-            soup.find('div', id='fast-navigation-block-static')
-            .find('a', class_='scroll-to-element reviews-count')
-            .find('span')
-            .text.strip()
-        )
-    except AttributeError:
-        pass
 
-    try:
-        product.screen_diagonal = float(
-            str(get_char_value(char_section, 'Дисплей', 'Діагональ екрану')).replace('"', '')
+class HttpBackend:
+    def __init__(self, fetcher: Fetcher, archive: HtmlArchive) -> None:
+        self.fetcher = fetcher
+        self.archive = archive
+
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]:
+        return get_page_content(jobs, self.fetcher, self.archive)
+
+
+def printed(products: Iterable[ProductData]) -> Iterator[ProductData]:
+    for product in products:
+        pprint(asdict(product), width=119)
+        yield product
+
+
+def read_urls(args: argparse.Namespace) -> Iterator[str]:
+    yield from args.urls
+    if args.input:
+        with open(args.input) as f:
+            yield from (line.strip() for line in f if line.strip())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Scrape brain.com.ua product pages')
+    parser.add_argument('urls', nargs='*', help='product page URLs (default: URL)')
+    parser.add_argument('-i', '--input', help='file with product page URLs, one per line')
+    parser.add_argument('--workers', type=int, default=16, help='concurrent requests')
+    parser.add_argument('--per-host', type=int, default=4, help='concurrent requests per host')
+    parser.add_argument('--batch-size', type=int, default=500, help='products per database batch')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR, help='directory of the raw HTML archive')
+    parser.add_argument('--from-archive', action='store_true', help='re-parse every archived page instead of fetching')
+    parser.add_argument('--processes', type=int, help='parser processes (default: all cores)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print every scraped product')
+    args = parser.parse_args()
+    if not args.urls and not args.input:
+        args.urls = [URL]
+
+    archive = HtmlArchive(args.archive)
+    if args.from_archive:
+        products = reparse(archive, workers=args.processes)
+        save_products(printed(products) if args.verbose else products, batch_size=args.batch_size)
+        return
+
+    with Fetcher(workers=args.workers, per_host=args.per_host) as fetcher:
+        pipeline = Pipeline(
+            HttpBackend(fetcher, archive),
+            parse_workers=args.processes,
+            batch_size=args.batch_size,
+            verbose=args.verbose,
         )
-    except AttributeError:
-        pass
-
-    try:
-        product.resolution = str(get_char_value(char_section, 'Дисплей', 'Роздільна здатність екрану')).replace(
-            ' ', ''
-        )  # TODO: maybe separate to list integers: [int, int]
-    except AttributeError:
-        pass
-
-    try:
-        for item in char_section.find_all('div', class_='br-pr-chr-item'):
-            title = item.find('h3').text.strip()
-            product.characteristics[title] = {}
-            chars = item.find('div').find_all('div')
-            for char in chars:
-                char_name, char_value = char.find_all('span')
-                product.characteristics[title][char_name.text.strip()] = clean_value(char_value.text)
-    except AttributeError:
-        pass
-
-    save_product(product)
-
-    pprint(asdict(product), width=119)
+        pipeline.run(read_urls(args))
 
 
 if __name__ == '__main__':
@@ -1,36 +1,33 @@
-import time
-from contextlib import contextmanager
-from dataclasses import asdict
-from pprint import pprint
-from typing import Generator
+import argparse
+from collections.abc import Iterable
+from collections.abc import Iterator
 
 from selenium import webdriver
 from selenium.common import ElementNotInteractableException
-from selenium.common import NoSuchElementException
 from selenium.common import TimeoutException
+from selenium.common import WebDriverException
 from selenium.webdriver import Firefox
 from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.webdriver import WebDriver
-from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
-from load_django import ProductData
-from load_django import clean_value
-from load_django import save_product
+from archive import DEFAULT_ARCHIVE_DIR
+from archive import HtmlArchive
+from blocking import ResourcePolicy
+from blocking import add_policy_arguments
+from pipeline import FetchedPage
+from pipeline import Pipeline
 
 SITE_URL = 'https://brain.com.ua/ukr/'
 SEARCH_QUERY = 'Apple iPhone 15 128GB Black'
+FIRST_SEARCH_RESULT = "(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a"
 
-
-def get_char_value(tag: WebElement, section_name: str, char_name: str) -> str | None:
-    if char_header := tag.find_element(By.XPATH, f'//h3[text()="{section_name}"]'):
-        if attr_name := char_header.find_element(By.XPATH, f'./following-sibling::div//span[text()="{char_name}"]'):
-            parent_div = attr_name.find_element(By.XPATH, './..')
-            spans = parent_div.find_elements(By.TAG_NAME, 'span')
-            if value := spans[1].get_attribute('textContent'):
-                return value.strip()
-    return None
+# each poll and the final read are a single WebDriver round trip
+PRODUCT_PAGE_READY = """
+return document.readyState !== 'loading'
+    && document.querySelector("div[data-section='characteristics'] div.br-pr-chr-item") !== null;
+"""
+PRODUCT_PAGE_SNAPSHOT = 'return {url: location.href, html: document.documentElement.outerHTML};'
 
 
 def click_element_safely(driver: Firefox, xpath: str) -> None:
@@ -48,139 +45,79 @@ def click_element_safely(driver: Firefox, xpath: str) -> None:
         print(f'Error: {e}')
 
 
-@contextmanager
-def get_page_content() -> Generator[WebDriver]:
-    driver = webdriver.Firefox()
-    driver.get(SITE_URL)
-    try:
-        search_input = driver.find_element(
-            By.XPATH, "//div[@class='header-bottom-in']//input[@class='quick-search-input']"
-        )
-        search_input.send_keys(SEARCH_QUERY)
-        search_button = driver.find_element(
-            By.XPATH, "//div[@class='header-bottom-in']//input[@class='search-button-first-form']"
-        )
-        search_button.click()
+def product_page_ready(driver: Firefox) -> bool:
+    return driver.execute_script(PRODUCT_PAGE_READY)
 
-        WebDriverWait(driver, 3).until(
-            lambda d: d.find_element(
-                By.XPATH, "(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a"
-            )
-        )
 
-        click_element_safely(driver, "(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a")
+def new_driver(policy: ResourcePolicy = ResourcePolicy()) -> Firefox:
+    options = webdriver.FirefoxOptions()
+    # return from navigation at DOMContentLoaded, the explicit waits below cover what we need
+    options.page_load_strategy = 'eager'
+    for name, value in policy.firefox_prefs().items():
+        options.set_preference(name, value)
+    return webdriver.Firefox(options=options)
 
-        time.sleep(3)
 
-        yield driver
-    finally:
-        driver.quit()
+def get_page_content(driver: Firefox, archive: HtmlArchive, query: str = SEARCH_QUERY) -> tuple[str, str]:
+    driver.get(SITE_URL)
 
+    search_input = driver.find_element(
+        By.XPATH, "//div[@class='header-bottom-in']//input[@class='quick-search-input']"
+    )
+    search_input.send_keys(query)
+    search_button = driver.find_element(
+        By.XPATH, "//div[@class='header-bottom-in']//input[@class='search-button-first-form']"
+    )
+    search_button.click()
 
-def main() -> None:
-    product = ProductData()
-    with get_page_content() as browser:
-        try:
-            char_section: WebElement | None = browser.find_element(By.XPATH, "//div[@data-section='characteristics']")
-        except NoSuchElementException:
-            char_section = None
+    WebDriverWait(driver, 3).until(lambda d: d.find_element(By.XPATH, FIRST_SEARCH_RESULT))
 
-        try:
-            if title := browser.find_element(By.XPATH, "//div[@data-section='top']/h1").get_attribute('textContent'):
-                product.title = title.strip()
-        except NoSuchElementException:
-            pass
+    click_element_safely(driver, FIRST_SEARCH_RESULT)
 
-        try:
-            if char_section:
-                if color := get_char_value(char_section, 'Фізичні характеристики', 'Колір'):
-                    product.color = color.strip()
-        except NoSuchElementException:
-            pass
+    WebDriverWait(driver, 10, poll_frequency=0.1).until(product_page_ready)
 
-        try:
-            if char_section:
-                if ssd := get_char_value(char_section, "Функції пам'яті", "Вбудована пам'ять"):
-                    product.ssd = ssd.strip()
-        except NoSuchElementException:
-            pass
+    snapshot = driver.execute_script(PRODUCT_PAGE_SNAPSHOT)
+    archive.put(snapshot['url'], snapshot['html'])
+    return snapshot['url'], snapshot['html']
 
-        try:
-            if char_section:
-                if manufacturer := get_char_value(char_section, 'Інші', 'Виробник'):
-                    product.manufacturer = manufacturer.strip()
-        except NoSuchElementException:
-            pass
-
-        try:
-            if prices := browser.find_elements(
-                By.XPATH, "//div[@class='br-pr-price main-price-block']//div[@class='price-wrapper']/span"
-            ):
-                if len(prices) > 0:
-                    if price := prices[0].get_attribute('textContent'):
-                        product.price = int(price.strip().replace(' ', ''))
-                if len(prices) > 1:
-                    if promo_price := prices[1].get_attribute('textContent'):
-                        product.promo_price = int(promo_price.strip().replace(' ', ''))
-        except NoSuchElementException:
-            pass
 
-        try:
-            images = browser.find_elements(By.XPATH, "//div[@class='product-block-bottom']//img")
-            product.images = [img.get_attribute('src') for img in images]
-        except NoSuchElementException:
-            pass
+class SeleniumBackend:
+    """Runs search queries one after another in a single Firefox session."""
 
-        try:
-            if code := browser.find_element(
-                By.XPATH, "//div[@data-section='top']//div[@id='product_code']//span[@class='br-pr-code-val']"
-            ).get_attribute('textContent'):
-                product.code = code.strip()
-        except NoSuchElementException:
-            pass
+    def __init__(self, policy: ResourcePolicy = ResourcePolicy(), archive: HtmlArchive | None = None) -> None:
+        self.policy = policy
+        self.archive = archive or HtmlArchive()
 
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]:
+        driver = new_driver(self.policy)
         try:
-            if num_reviews := browser.find_element(
-                By.XPATH, "//div[@id='fast-navigation-block-static']//a[@class='scroll-to-element reviews-count']/span"
-            ).get_attribute('textContent'):
-                product.num_reviews = int(num_reviews.strip())
-        except NoSuchElementException:
-            pass
+            for query in jobs:
+                try:
+                    url, html_doc = get_page_content(driver, self.archive, query)
+                except WebDriverException as e:
+                    print(f'Failed to scrape {query}: {e.msg}\n')
+                    continue
+                yield FetchedPage(url, html_doc)
+        finally:
+            driver.quit()
 
-        try:
-            if char_section:
-                if screen_diagonal := get_char_value(char_section, 'Дисплей', 'Діагональ екрану'):
-                    product.screen_diagonal = float(screen_diagonal.strip().replace('"', ''))
-        except NoSuchElementException:
-            pass
 
-        try:
-            if char_section:
-                if resolution := get_char_value(char_section, 'Дисплей', 'Роздільна здатність екрану'):
-                    product.resolution = resolution.strip().replace(' ', '')
-        except NoSuchElementException:
-            pass
-
-        if char_section:
-            try:
-                for item in char_section.find_elements(By.XPATH, "//div[@class='br-pr-chr-item']"):
-                    if title := item.find_element(By.TAG_NAME, 'h3').get_attribute('textContent'):
-                        product.characteristics[title.strip()] = {}
-                        chars = item.find_element(By.TAG_NAME, 'div').find_elements(By.TAG_NAME, 'div')
-                        for char in chars:
-                            char_name, char_value = char.find_elements(By.TAG_NAME, 'span')
-                            attr_name = char_name.get_attribute('textContent')
-                            attr_value = char_value.get_attribute('textContent')
-                            if attr_name and attr_value:
-                                product.characteristics[title.strip()][attr_name.strip()] = clean_value(
-                                    attr_value.strip()
-                                )
-            except NoSuchElementException:
-                pass
-
-    save_product(product)
-
-    pprint(asdict(product), width=119)
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Scrape the first brain.com.ua search hit with Firefox WebDriver')
+    parser.add_argument('queries', nargs='*', help='search queries (default: SEARCH_QUERY)')
+    parser.add_argument('--batch-size', type=int, default=500, help='products per database batch')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print every scraped product')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR, help='directory of the raw HTML archive')
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    pipeline = Pipeline(
+        SeleniumBackend(ResourcePolicy.from_args(args), HtmlArchive(args.archive)),
+        parse_workers=1,
+        batch_size=args.batch_size,
+        verbose=args.verbose,
+    )
+    pipeline.run(args.queries or [SEARCH_QUERY])
 
 
 if __name__ == '__main__':
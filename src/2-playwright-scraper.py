@@ -1,146 +1,198 @@
-from dataclasses import asdict
-from pprint import pprint
-from typing import Any
-
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-
-from load_django import ProductData
-from load_django import clean_value
-from load_django import save_product
+import argparse
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+from playwright.async_api import Browser
+from playwright.async_api import BrowserContext
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+from playwright.async_api import Route
+from playwright.async_api import async_playwright
+
+from archive import DEFAULT_ARCHIVE_DIR
+from archive import HtmlArchive
+from blocking import ResourcePolicy
+from blocking import add_policy_arguments
+from pipeline import FetchedPage
+from pipeline import Pipeline
 
 SITE_URL = 'https://brain.com.ua/ukr/'
 SEARCH_QUERY = 'Apple iPhone 15 128GB Black'
+FIRST_SEARCH_RESULT = "(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a"
 
 
-def get_char_value(tag: Any, section_name: str, char_name: str) -> str | None:
-    if char_header := tag.find('h3', string=section_name):
-        if color_label := char_header.parent.find('span', string=char_name):
-            return color_label.parent.find_all('span')[1].text.strip()
-    return None
-
-
-def get_page_content() -> str:
-    with sync_playwright() as p:
-        browser = p.firefox.launch()
-        page = browser.new_page()
-        page.goto(SITE_URL)
+async def get_page_content(page: Page, job: str, archive: HtmlArchive) -> str:
+    """Open a product page, either directly by URL or as the first hit of a site search."""
+    # navigation returns as soon as the response starts, only the nodes we read are waited for
+    if job.startswith(('http://', 'https://')):
+        await page.goto(job, wait_until='commit')
+    else:
+        await page.goto(SITE_URL, wait_until='commit')
 
-        search_input = page.wait_for_selector('div.header-bottom-in input.quick-search-input', timeout=10000)
+        search_input = await page.wait_for_selector('div.header-bottom-in input.quick-search-input', timeout=10000)
 
         if search_input:
-            search_input.fill(SEARCH_QUERY)
-
-        page.click('div.header-bottom-in input.search-button-first-form')
-
-        page.wait_for_selector(
-            "(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a",
-            timeout=10000,
+            await search_input.fill(job)
+
+        await page.click('div.header-bottom-in input.search-button-first-form')
+
+        await page.wait_for_selector(FIRST_SEARCH_RESULT, timeout=10000)
+
+        first_product = page.locator(FIRST_SEARCH_RESULT).first
+        await first_product.scroll_into_view_if_needed()
+        await first_product.click()
+
+    await page.wait_for_selector("div[data-section='characteristics']", timeout=10000)
+
+    page_source = await page.content()
+    archive.put(page.url, page_source)
+    return page_source
+
+
+class BrowserPool:
+    """One long-lived Firefox with `size` concurrent contexts, each recycled after `pages_per_context` pages."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        pages_per_context: int = 50,
+        archive: HtmlArchive | None = None,
+        policy: ResourcePolicy = ResourcePolicy(),
+    ) -> None:
+        self.size = size
+        self.pages_per_context = pages_per_context
+        self.archive = archive or HtmlArchive()
+        self.policy = policy
+        self.blocked = 0
+        self.pages = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    @property
+    def pages_per_minute(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.pages / elapsed * 60 if elapsed else 0.0
+
+    def report(self) -> None:
+        print(
+            f'Scraped {self.pages} pages ({self.failed} failed), {self.pages_per_minute:.1f} pages/min, '
+            f'{self.blocked} requests blocked'
         )
 
-        first_product = page.locator("(//div[@class='tab-content-wrapper']//div[@class='br-pp-imadds'])[1]//a").first
-        first_product.scroll_into_view_if_needed()
-        first_product.click()
-
-        page.wait_for_selector("div[data-section='characteristics']", timeout=10000)
-
-        page_source = page.content()
-        browser.close()
-        return page_source
+    async def _route(self, route: Route) -> None:
+        if self.policy.blocks(route.request.resource_type, route.request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self, browser: Browser) -> BrowserContext:
+        context = await browser.new_context()
+        if self.policy.deny_types or self.policy.allow_types or self.policy.deny_hosts:
+            await context.route('**/*', self._route)
+        return context
+
+    async def _report_every(self, seconds: float) -> None:
+        while True:
+            await asyncio.sleep(seconds)
+            self.report()
+
+    async def _worker(
+        self, browser: Browser, jobs: asyncio.Queue[str | None], results: queue.Queue[FetchedPage | None]
+    ) -> None:
+        context = await self._new_context(browser)
+        used = 0
+        try:
+            while (job := await jobs.get()) is not None:
+                if used >= self.pages_per_context:
+                    await context.close()
+                    context = await self._new_context(browser)
+                    used = 0
+
+                page = await context.new_page()
+                try:
+                    html_doc = await get_page_content(page, job, self.archive)
+                    # a full results queue means the pipeline is behind, wait for it off the event loop
+                    await asyncio.to_thread(results.put, FetchedPage(page.url, html_doc))
+                    self.pages += 1
+                except PlaywrightError as e:
+                    self.failed += 1
+                    print(f'Failed to scrape {job}: {e}\n')
+                finally:
+                    await page.close()
+                    used += 1
+        finally:
+            await context.close()
+
+    async def scrape(
+        self, jobs: Iterable[str], results: queue.Queue[FetchedPage | None], report_every: float = 30.0
+    ) -> None:
+        pending: asyncio.Queue[str | None] = asyncio.Queue()
+        for job in jobs:
+            pending.put_nowait(job)
+        for _ in range(self.size):
+            pending.put_nowait(None)
+
+        self.started = time.perf_counter()
+        async with async_playwright() as p:
+            browser = await p.firefox.launch()
+            reporter = asyncio.create_task(self._report_every(report_every))
+            try:
+                await asyncio.gather(*(self._worker(browser, pending, results) for _ in range(self.size)))
+            finally:
+                reporter.cancel()
+                await browser.close()
+        self.report()
+
+
+class PlaywrightBackend:
+    """Runs the async browser pool on its own event loop thread and hands pages over as they are scraped."""
+
+    def __init__(self, pool: BrowserPool) -> None:
+        self.pool = pool
+
+    def _run(self, jobs: Iterable[str], results: queue.Queue[FetchedPage | None]) -> None:
+        try:
+            asyncio.run(self.pool.scrape(jobs, results))
+        finally:
+            results.put(None)
+
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]:
+        results: queue.Queue[FetchedPage | None] = queue.Queue(maxsize=self.pool.size * 4)
+        threading.Thread(target=self._run, args=(jobs, results), name='browser-pool', daemon=True).start()
+        while (page := results.get()) is not None:
+            yield page
 
 
 def main() -> None:
-    html_doc = get_page_content()
-    soup = BeautifulSoup(html_doc, 'lxml')
-    char_section = soup.find('div', attrs={'data-section': 'characteristics'})
-
-    product = ProductData()
-
-    try:
-        product.title = soup.find('div', attrs={'data-section': 'top'}).find('h1').text.strip()
-    except AttributeError:
-        pass
-
-    try:
-        product.color = get_char_value(char_section, 'Фізичні характеристики', 'Колір')
-    except AttributeError:
-        pass
-
-    try:
-        product.ssd = get_char_value(char_section, "Функції пам'яті", "Вбудована пам'ять")
-    except AttributeError:
-        pass
-
-    try:
-        product.manufacturer = get_char_value(char_section, 'Інші', 'Виробник')
-    except AttributeError:
-        pass
-
-    try:
-        product.price = int(
-            soup.find('div', class_='br-pr-price main-price-block')
-            .find('div', class_='price-wrapper')
-            .find('span')
-            .text.strip()
-            .replace(' ', '')
-        )
-    except AttributeError:
-        pass
-
-    try:
-        images = soup.find('div', class_='product-block-bottom').find_all('img')
-        product.images = [img.get('src') for img in images]
-    except AttributeError:
-        pass
-
-    try:
-        product.code = (
-            soup.find('div', attrs={'data-section': 'top'})
-            .find('div', id='product_code')
-            .find('span', class_='br-pr-code-val')
-            .text.strip()
-        )
-    except AttributeError:
-        pass
-
-    try:
-        product.num_reviews = int(
-            soup.find('div', id='fast-navigation-block-static')
-            .find('a', class_='scroll-to-element reviews-count')
-            .find('span')
-            .text.strip()
-        )
-    except AttributeError:
-        pass
-
-    try:
-        product.screen_diagonal = float(
-            str(get_char_value(char_section, 'Дисплей', 'Діагональ екрану')).replace('"', '')
-        )
-    except AttributeError:
-        pass
-
-    try:
-        product.resolution = str(get_char_value(char_section, 'Дисплей', 'Роздільна здатність екрану')).replace(
-            ' ', ''
-        )
-    except AttributeError:
-        pass
-
-    try:
-        for item in char_section.find_all('div', class_='br-pr-chr-item'):
-            title = item.find('h3').text.strip()
-            product.characteristics[title] = {}
-            chars = item.find('div').find_all('div')
-            for char in chars:
-                char_name, char_value = char.find_all('span')
-                product.characteristics[title][char_name.text.strip()] = clean_value(char_value.text)
-    except AttributeError:
-        pass
-
-    save_product(product)
-
-    pprint(asdict(product), width=119)
+    parser = argparse.ArgumentParser(description='Scrape brain.com.ua products through a pool of Firefox contexts')
+    parser.add_argument('jobs', nargs='*', help='search queries or product page URLs (default: SEARCH_QUERY)')
+    parser.add_argument('-i', '--input', help='file with search queries or product page URLs, one per line')
+    parser.add_argument('--pool-size', type=int, default=4, help='concurrent browser contexts')
+    parser.add_argument('--pages-per-context', type=int, default=50, help='pages before a context is recycled')
+    parser.add_argument('--batch-size', type=int, default=500, help='products per database batch')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print every scraped product')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR, help='directory of the raw HTML archive')
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    jobs = list(args.jobs)
+    if args.input:
+        with open(args.input) as f:
+            jobs.extend(line.strip() for line in f if line.strip())
+
+    pool = BrowserPool(
+        args.pool_size,
+        args.pages_per_context,
+        archive=HtmlArchive(args.archive),
+        policy=ResourcePolicy.from_args(args),
+    )
+    pipeline = Pipeline(PlaywrightBackend(pool), batch_size=args.batch_size, verbose=args.verbose)
+    pipeline.run(jobs or [SEARCH_QUERY])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,83 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+from extractor import extract_product
+from load_django import ProductData
+
+DEFAULT_ARCHIVE_DIR = os.environ.get('HTML_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), 'archive'))
+
+
+class HtmlArchive:
+    """Content-addressed store of fetched pages: blobs/<sha256>.html.gz plus an append-only index.jsonl."""
+
+    def __init__(self, root: str | Path = DEFAULT_ARCHIVE_DIR) -> None:
+        self.root = Path(root)
+        self.blobs = self.root / 'blobs'
+        self.index_path = self.root / 'index.jsonl'
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs / digest[:2] / f'{digest[2:]}.html.gz'
+
+    def put(self, url: str, html_doc: str) -> str:
+        data = html_doc.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # write aside and rename, so readers never see a partial blob
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as f:
+                f.write(gzip.compress(data))
+            os.replace(f.name, path)
+
+        entry = {'url': url, 'sha256': digest, 'fetched_at': datetime.now(UTC).isoformat()}
+        with self._lock, open(self.index_path, 'a', encoding='utf-8') as index:
+            index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return digest
+
+    def get(self, digest: str) -> str:
+        return gzip.decompress(self.blob_path(digest).read_bytes()).decode('utf-8')
+
+    def latest(self) -> dict[str, str]:
+        """Map every archived url to the digest of its most recent fetch."""
+        entries: dict[str, str] = {}
+        if self.index_path.exists():
+            with open(self.index_path, encoding='utf-8') as index:
+                for line in index:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry['url']] = entry['sha256']
+        return entries
+
+
+def extract_blob(root: str, url: str, digest: str) -> ProductData:
+    product = extract_product(HtmlArchive(root).get(digest))
+    product.url = url
+    return product
+
+
+def reparse(archive: HtmlArchive, workers: int | None = None, chunksize: int = 16) -> Iterator[ProductData]:
+    """Re-run extraction over the latest page of every archived url in worker processes, without network."""
+    latest = archive.latest()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(
+            partial(extract_blob, str(archive.root)), latest.keys(), latest.values(), chunksize=chunksize
+        )
+
+
+__all__ = [
+    'reparse',
+    'DEFAULT_ARCHIVE_DIR',
+    'HtmlArchive',
+]
@@ -0,0 +1,111 @@
+import argparse
+from dataclasses import dataclass
+from dataclasses import field
+from urllib.parse import urlsplit
+
+# Playwright resource types; 'document', 'script', 'xhr' and 'fetch' are needed for search and characteristics
+RESOURCE_TYPES = {
+    'document',
+    'stylesheet',
+    'image',
+    'media',
+    'font',
+    'script',
+    'texttrack',
+    'xhr',
+    'fetch',
+    'eventsource',
+    'websocket',
+    'manifest',
+    'other',
+}
+DEFAULT_DENY_TYPES = frozenset({'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'})
+DEFAULT_DENY_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'criteo.com',
+    'criteo.net',
+    'tiktok.com',
+    'clarity.ms',
+)
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+    deny_types: frozenset[str] = DEFAULT_DENY_TYPES
+    # when set, every type outside the allow list is blocked and deny_types is ignored
+    allow_types: frozenset[str] = frozenset()
+    deny_hosts: tuple[str, ...] = field(default=DEFAULT_DENY_HOSTS)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> 'ResourcePolicy':
+        if args.no_blocking:
+            return cls(deny_types=frozenset(), deny_hosts=())
+        return cls(
+            deny_types=frozenset(args.block) if args.block else DEFAULT_DENY_TYPES,
+            allow_types=frozenset(args.allow or ()),
+        )
+
+    def blocks_type(self, resource_type: str) -> bool:
+        if resource_type == 'document':
+            return False
+        if self.allow_types:
+            return resource_type not in self.allow_types
+        return resource_type in self.deny_types
+
+    def blocks_host(self, url: str) -> bool:
+        host = urlsplit(url).hostname or ''
+        return any(host == denied or host.endswith(f'.{denied}') for denied in self.deny_hosts)
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        return self.blocks_type(resource_type) or self.blocks_host(url)
+
+    def firefox_prefs(self) -> dict[str, int | bool]:
+        """Firefox preferences approximating the policy for WebDriver sessions, which cannot intercept requests."""
+        prefs: dict[str, int | bool] = {}
+        if self.blocks_type('image'):
+            prefs['permissions.default.image'] = 2
+        if self.blocks_type('stylesheet'):
+            prefs['permissions.default.stylesheet'] = 2
+        if self.blocks_type('font'):
+            prefs['browser.display.use_document_fonts'] = 0
+            prefs['gfx.downloadable_fonts.enabled'] = False
+        if self.blocks_type('media'):
+            prefs['media.autoplay.default'] = 5
+            prefs['media.autoplay.blocking_policy'] = 2
+        if self.deny_hosts:
+            # host lists cannot be expressed as prefs; tracking protection covers analytics and ad networks
+            prefs['privacy.trackingprotection.enabled'] = True
+            prefs['privacy.trackingprotection.socialtracking.enabled'] = True
+        return prefs
+
+
+def add_policy_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group('resource blocking')
+    group.add_argument(
+        '--block',
+        action='append',
+        choices=sorted(RESOURCE_TYPES),
+        metavar='TYPE',
+        help=f'resource type to block, repeatable (default: {", ".join(sorted(DEFAULT_DENY_TYPES))})',
+    )
+    group.add_argument(
+        '--allow',
+        action='append',
+        choices=sorted(RESOURCE_TYPES),
+        metavar='TYPE',
+        help='resource type to allow, repeatable; everything else is blocked',
+    )
+    group.add_argument('--no-blocking', action='store_true', help='load every resource')
+
+
+__all__ = [
+    'add_policy_arguments',
+    'ResourcePolicy',
+]
@@ -0,0 +1,284 @@
+import io
+import json
+import time
+from collections.abc import Iterable
+from itertools import batched
+from typing import IO
+
+from load_django import PRODUCT_FIELDS
+from load_django import IngestStats
+from load_django import ProductData
+from load_django import SyncStats
+from load_django import attribute_cache
+from load_django import has_required_fields
+from load_django import parse_value
+from load_django import product_hash
+from load_django import setup_django
+
+COPY_CHUNK_SIZE = 1 << 20
+
+STAGING_COLUMNS = {
+    'staging_products': ['seq', *PRODUCT_FIELDS, 'url', 'data_hash'],
+    'staging_images': ['seq', 'url'],
+    'staging_values': ['seq', 'group_name', 'attr_name', 'value', 'value_num', 'value_unit'],
+}
+
+CREATE_STAGING = """
+CREATE TEMP TABLE staging_products (
+    seq bigint, title varchar, color varchar, ssd varchar, manufacturer varchar, price integer, promo_price integer,
+    code varchar, num_reviews integer, screen_diagonal double precision, resolution varchar, characteristics jsonb,
+    url varchar, data_hash varchar
+) ON COMMIT DROP;
+CREATE TEMP TABLE staging_images (seq bigint, url varchar) ON COMMIT DROP;
+CREATE TEMP TABLE staging_values (
+    seq bigint, group_name varchar, attr_name varchar, value varchar, value_num double precision, value_unit varchar
+) ON COMMIT DROP;
+"""
+
+# products are matched by their store code, the last record of the stream wins
+STAGE_LATEST = """
+CREATE TEMP TABLE staging_latest ON COMMIT DROP AS
+SELECT DISTINCT ON (code) * FROM staging_products ORDER BY code, seq DESC;
+"""
+
+# compared before the merge overwrites the stored prices, new products count as changed
+STAGE_PRICE_CHANGES = """
+CREATE TEMP TABLE staging_price_changes ON COMMIT DROP AS
+SELECT l.code, l.price, l.promo_price FROM staging_latest l LEFT JOIN products p ON p.code = l.code
+WHERE p.id IS NULL OR (p.price, p.promo_price) IS DISTINCT FROM (l.price, l.promo_price);
+"""
+
+MERGE_PRODUCTS = """
+INSERT INTO products (id, {columns})
+SELECT gen_random_uuid(), {columns} FROM staging_latest
+ON CONFLICT (code) DO UPDATE SET {updates};
+"""
+
+MERGE_FINGERPRINTS = """
+INSERT INTO page_fingerprints (id, url, data_hash, checked_at, product_id)
+SELECT DISTINCT ON (l.url) gen_random_uuid(), l.url, l.data_hash, now(), p.id
+FROM staging_latest l JOIN products p ON p.code = l.code WHERE l.url IS NOT NULL
+ORDER BY l.url, l.seq DESC
+ON CONFLICT (url) DO UPDATE
+SET data_hash = EXCLUDED.data_hash, checked_at = EXCLUDED.checked_at, product_id = EXCLUDED.product_id;
+"""
+
+STAGE_IDS = """
+CREATE TEMP TABLE staging_ids ON COMMIT DROP AS
+SELECT l.seq, p.id AS product_id FROM staging_latest l JOIN products p ON p.code = l.code;
+ANALYZE staging_ids;
+"""
+
+RECORD_PRICES = """
+INSERT INTO price_observations (product_id, observed_at, price, promo_price)
+SELECT p.id, now(), c.price, c.promo_price FROM staging_price_changes c JOIN products p ON p.code = c.code
+ON CONFLICT DO NOTHING;
+"""
+
+MERGE_ATTRIBUTES = """
+CREATE TEMP TABLE staging_attributes ON COMMIT DROP AS
+SELECT DISTINCT v.group_name, v.attr_name FROM staging_values v JOIN staging_ids USING (seq);
+
+INSERT INTO attribute_groups (id, name)
+SELECT gen_random_uuid(), n.group_name FROM (SELECT DISTINCT group_name FROM staging_attributes) n
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO attributes (id, name, group_id)
+SELECT gen_random_uuid(), s.attr_name, g.id FROM staging_attributes s JOIN attribute_groups g ON g.name = s.group_name
+ON CONFLICT (group_id, name) DO NOTHING;
+
+CREATE TEMP TABLE staging_attribute_ids ON COMMIT DROP AS
+SELECT s.group_name, s.attr_name, a.id AS attribute_id
+FROM staging_attributes s
+JOIN attribute_groups g ON g.name = s.group_name
+JOIN attributes a ON a.group_id = g.id AND a.name = s.attr_name;
+
+CREATE TEMP TABLE staging_value_rows ON COMMIT DROP AS
+SELECT i.product_id, m.attribute_id, v.value, v.value_num, v.value_unit
+FROM staging_values v JOIN staging_ids i USING (seq) JOIN staging_attribute_ids m USING (group_name, attr_name);
+ANALYZE staging_value_rows;
+
+CREATE TEMP TABLE staging_image_rows ON COMMIT DROP AS
+SELECT DISTINCT i.product_id, s.url FROM staging_images s JOIN staging_ids i USING (seq);
+ANALYZE staging_image_rows;
+"""
+
+# same diff semantics as the ORM path: stale rows go, changed values are updated in place
+DELETE_VALUES = """
+DELETE FROM attribute_values av USING staging_ids i
+WHERE av.product_id = i.product_id AND NOT EXISTS (
+    SELECT 1 FROM staging_value_rows r WHERE r.product_id = av.product_id AND r.attribute_id = av.attribute_id
+);
+"""
+
+UPDATE_VALUES = """
+UPDATE attribute_values av SET value = r.value, value_num = r.value_num, value_unit = r.value_unit
+FROM staging_value_rows r
+WHERE av.product_id = r.product_id AND av.attribute_id = r.attribute_id AND av.value IS DISTINCT FROM r.value;
+"""
+
+INSERT_VALUES = """
+INSERT INTO attribute_values (id, value, value_num, value_unit, attribute_id, product_id)
+SELECT gen_random_uuid(), r.value, r.value_num, r.value_unit, r.attribute_id, r.product_id FROM staging_value_rows r
+ON CONFLICT (product_id, attribute_id) DO NOTHING;
+"""
+
+DELETE_IMAGES = """
+DELETE FROM product_images pi USING staging_ids i
+WHERE pi.product_id = i.product_id AND (
+    NOT EXISTS (SELECT 1 FROM staging_image_rows r WHERE r.product_id = pi.product_id AND r.url = pi.url)
+    OR EXISTS (
+        SELECT 1 FROM product_images d WHERE d.product_id = pi.product_id AND d.url = pi.url AND d.id < pi.id
+    )
+);
+"""
+
+INSERT_IMAGES = """
+INSERT INTO product_images (id, url, product_id)
+SELECT gen_random_uuid(), r.url, r.product_id FROM staging_image_rows r
+WHERE NOT EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = r.product_id AND pi.url = r.url);
+"""
+
+
+def copy_text(value) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def copy_from(cursor, sql: str, file: IO) -> None:
+    """Run a COPY ... FROM STDIN statement fed from `file`, with either driver."""
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, file)
+        return
+    # psycopg 3, used when the connection pool is enabled
+    with cursor.copy(sql) as copy:
+        while data := file.read(COPY_CHUNK_SIZE):
+            copy.write(data)
+
+
+def copy_to(cursor, sql: str, file: IO) -> None:
+    """Run a COPY ... TO STDOUT statement into `file`, with either driver."""
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, file)
+        return
+    with cursor.copy(sql) as copy:
+        for data in copy:
+            file.write(data)
+
+
+def copy_rows(cursor, table: str, columns: list[str], rows: Iterable[tuple]) -> None:
+    """COPY rows into `columns` of `table` in PostgreSQL text format."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(map(copy_text, row)))
+        buffer.write('\n')
+    buffer.seek(0)
+    copy_from(cursor, f'COPY {table} ({", ".join(columns)}) FROM STDIN', buffer)
+
+
+def stage(cursor, items: Iterable[ProductData], chunk_size: int) -> tuple[int, int]:
+    """Stream records into the staging tables, returning (staged, skipped)."""
+    staged = skipped = 0
+    for chunk in batched(items, chunk_size):
+        products: list[tuple] = []
+        images: list[tuple] = []
+        values: list[tuple] = []
+        for data in chunk:
+            if not has_required_fields(data):
+                skipped += 1
+                continue
+            seq = staged = staged + 1
+            fields = {name: getattr(data, name) for name in PRODUCT_FIELDS}
+            fields['characteristics'] = json.dumps(data.characteristics, ensure_ascii=False)
+            products.append((seq, *fields.values(), data.url, product_hash(data)))
+            images.extend((seq, url) for url in data.images)
+            values.extend(
+                (seq, group_name, attr_name, value, *parse_value(value))
+                for group_name, attrs in data.characteristics.items()
+                for attr_name, value in attrs.items()
+            )
+        copy_rows(cursor, 'staging_products', STAGING_COLUMNS['staging_products'], products)
+        copy_rows(cursor, 'staging_images', STAGING_COLUMNS['staging_images'], images)
+        copy_rows(cursor, 'staging_values', STAGING_COLUMNS['staging_values'], values)
+    return staged, skipped
+
+
+def copy_products(items: Iterable[ProductData], chunk_size: int = 10_000) -> IngestStats:
+    """Load products with COPY into temporary staging tables and merge them with set-based SQL.
+
+    Meant for first loads and full re-imports: everything is one transaction, so a failure leaves the catalog as it
+    was. Content hashes are recorded in page_fingerprints, later incremental runs skip the unchanged pages.
+    """
+    setup_django()
+
+    from django.db import connection
+    from django.db import transaction
+
+    from products.cache import invalidate_catalog
+    from products.facets import rebuild_facet_counts
+    from products.search import SEARCH_VECTOR
+
+    columns = ', '.join(PRODUCT_FIELDS)
+    updates = ', '.join(f'{name} = EXCLUDED.{name}' for name in PRODUCT_FIELDS if name != 'code')
+
+    started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CREATE_STAGING)
+        staged, skipped = stage(cursor, items, chunk_size)
+        # temporary tables are never auto-analyzed, the merge plans need their sizes
+        cursor.execute('ANALYZE staging_products; ANALYZE staging_images; ANALYZE staging_values;')
+
+        cursor.execute(STAGE_LATEST)
+        cursor.execute(STAGE_PRICE_CHANGES)
+        cursor.execute(MERGE_PRODUCTS.format(columns=columns, updates=updates))
+        products = cursor.rowcount
+        cursor.execute(RECORD_PRICES)
+        cursor.execute(MERGE_FINGERPRINTS)
+        cursor.execute(STAGE_IDS)
+        cursor.execute(
+            f'UPDATE products SET search_vector = {SEARCH_VECTOR} WHERE id IN (SELECT product_id FROM staging_ids)'
+        )
+        cursor.execute(MERGE_ATTRIBUTES)
+
+        churn = SyncStats()
+        for sql, counter in (
+            (DELETE_IMAGES, 'deleted'),
+            (INSERT_IMAGES, 'inserted'),
+            (DELETE_VALUES, 'deleted'),
+            (UPDATE_VALUES, 'updated'),
+            (INSERT_VALUES, 'inserted'),
+        ):
+            cursor.execute(sql)
+            setattr(churn, counter, getattr(churn, counter) + cursor.rowcount)
+        # recounting once is cheaper than tracking the deltas of a set-based merge
+        rebuild_facet_counts()
+
+    # groups and attributes were created behind the cache's back
+    attribute_cache.invalidate()
+    invalidate_catalog()
+
+    stats = IngestStats(
+        products=products,
+        skipped=skipped,
+        rows=products + churn.rows,
+        seconds=time.perf_counter() - started,
+        churn=churn,
+    )
+    if skipped:
+        print(f'Skipped {skipped} products without code or a required field\n')
+    print(
+        f'Copied {staged} records into {stats.products} products ({stats.rows} rows) in {stats.seconds:.2f}s, '
+        f'{stats.products / stats.seconds * 60 if stats.seconds else 0:.0f} products/min; '
+        f'child rows inserted {churn.inserted}, updated {churn.updated}, deleted {churn.deleted}'
+    )
+    return stats
+
+
+__all__ = [
+    'copy_from',
+    'copy_products',
+    'copy_rows',
+    'copy_text',
+    'copy_to',
+]
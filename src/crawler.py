@@ -0,0 +1,153 @@
+import argparse
+from collections.abc import Iterable
+from urllib.parse import quote_plus
+
+from archive import DEFAULT_ARCHIVE_DIR
+from archive import HtmlArchive
+from extractor import extract_listing
+from extractor import extract_listing_links
+from extractor import extract_product
+from fetcher import Fetcher
+from frontier import DEFAULT_FRONTIER_PATH
+from frontier import LISTING
+from frontier import PRODUCT
+from frontier import Frontier
+from load_django import Fingerprint
+from load_django import ProductData
+from load_django import ProductWriter
+from load_django import load_fingerprints
+from load_django import update_listing_prices
+
+SEARCH_URL = 'https://brain.com.ua/ukr/search/?Search={query}'
+
+SEED_PRIORITY = 10
+LISTING_PRIORITY = 5
+PRODUCT_PRIORITY = 0
+
+
+class Crawler:
+    """Walks category and search-result listings into the frontier, then fetches, parses and saves product pages."""
+
+    def __init__(
+        self,
+        frontier: Frontier,
+        fetcher: Fetcher,
+        archive: HtmlArchive,
+        batch_size: int = 500,
+        listing_fast_path: bool = False,
+    ) -> None:
+        self.frontier = frontier
+        self.fetcher = fetcher
+        self.archive = archive
+        self.batch_size = batch_size
+        self.writer = ProductWriter(batch_size)
+        # refresh prices of known products straight from listing cards and only open new or disputed products
+        self.listing_fast_path = listing_fast_path
+
+    def seed(self, listing_urls: Iterable[str] = (), queries: Iterable[str] = ()) -> int:
+        urls = [*listing_urls, *(SEARCH_URL.format(query=quote_plus(query)) for query in queries)]
+        return self.frontier.add(urls, LISTING, priority=SEED_PRIORITY)
+
+    def crawl_listings(self) -> int:
+        if not (urls := self.frontier.claim(LISTING, self.batch_size)):
+            return 0
+
+        done: list[str] = []
+        failed: list[str] = []
+        for result in self.fetcher.fetch_all(urls):
+            if not result.ok:
+                print(f'Failed to fetch {result.url}: {result.error or result.status}\n')
+                failed.append(result.url)
+                continue
+            product_urls, listing_urls = extract_listing_links(result.text, result.url)
+            if self.listing_fast_path and (items := extract_listing(result.text, result.url)):
+                product_urls = [item.url for item in update_listing_prices(items) if item.url]
+                self.frontier.add(product_urls, PRODUCT, priority=PRODUCT_PRIORITY, requeue=True)
+            else:
+                self.frontier.add(product_urls, PRODUCT, priority=PRODUCT_PRIORITY)
+            self.frontier.add(listing_urls, LISTING, priority=LISTING_PRIORITY)
+            done.append(result.url)
+
+        self.frontier.done(done)
+        self.frontier.failed(failed)
+        return len(urls)
+
+    def crawl_products(self) -> int:
+        if not (urls := self.frontier.claim(PRODUCT, self.batch_size)):
+            return 0
+
+        validators = {url: (fp.etag, fp.last_modified) for url, fp in load_fingerprints(urls).items()}
+        fetched: dict[str, Fingerprint] = {}
+        products: list[ProductData] = []
+        unchanged: list[str] = []
+        failed: list[str] = []
+        for result in self.fetcher.fetch_all(urls, validators):
+            if result.not_modified:
+                unchanged.append(result.url)
+            elif result.ok:
+                self.archive.put(result.url, result.text)
+                fetched[result.url] = Fingerprint(result.etag, result.last_modified)
+                product = extract_product(result.text)
+                product.url = result.url
+                products.append(product)
+            else:
+                print(f'Failed to fetch {result.url}: {result.error or result.status}\n')
+                failed.append(result.url)
+
+        # urls are only marked done once their products are committed, so a crash re-crawls at most one batch;
+        # pages without a product code or duplicating another url's product are final, fetching them again won't help
+        stats = self.writer.write(products, fetched)
+        retry = set(stats.failed_urls)
+        failed.extend(retry)
+        unchanged.extend(product.url for product in products if product.url not in retry)
+        self.frontier.done(unchanged)
+        self.frontier.failed(failed)
+        return len(urls)
+
+    def run(self) -> None:
+        # listings first, so the frontier fills up before product pages drain it
+        while self.crawl_listings() or self.crawl_products():
+            pass
+        self.writer.report()
+        for (kind, state), count in sorted(self.frontier.counts().items()):
+            print(f'{kind} {state}: {count}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Crawl brain.com.ua categories and search results')
+    parser.add_argument('--seed', action='append', default=[], help='category or listing URL, repeatable')
+    parser.add_argument('--query', action='append', default=[], help='search query, repeatable')
+    parser.add_argument('--frontier', default=DEFAULT_FRONTIER_PATH, help='SQLite frontier database')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR, help='directory of the raw HTML archive')
+    parser.add_argument('--recrawl', action='store_true', help='queue every finished url again')
+    parser.add_argument(
+        '--listing-prices',
+        action='store_true',
+        help='update prices from listing cards, open product pages only for new or disputed products',
+    )
+    parser.add_argument('--workers', type=int, default=16, help='concurrent requests')
+    parser.add_argument('--per-host', type=int, default=4, help='concurrent requests per host')
+    parser.add_argument('--batch-size', type=int, default=500, help='urls claimed and products saved per round')
+    args = parser.parse_args()
+
+    frontier = Frontier(args.frontier)
+    try:
+        if args.recrawl:
+            # the fast path only re-walks listings, product pages are queued again when a card needs them
+            frontier.requeue(LISTING if args.listing_prices else None)
+        with Fetcher(workers=args.workers, per_host=args.per_host) as fetcher:
+            crawler = Crawler(
+                frontier,
+                fetcher,
+                HtmlArchive(args.archive),
+                batch_size=args.batch_size,
+                listing_fast_path=args.listing_prices,
+            )
+            crawler.seed(args.seed, args.query)
+            crawler.run()
+    finally:
+        frontier.close()
+
+
+if __name__ == '__main__':
+    main()
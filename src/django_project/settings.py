@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'products',
 ]
 
@@ -89,6 +90,36 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        # scrapers and loaders are long-running, keep their connection between batches
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=600),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# connection pool of psycopg 3 (pip install "psycopg[pool]" in place of psycopg2);
+# Django refuses persistent connections together with a pool
+if env.bool('DB_POOL', default=False):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+        },
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# file based, so scrapers and loaders running in their own processes can invalidate what the API serves
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': env('CACHE_DIR', default=str(BASE_DIR / 'cache')),
+        'TIMEOUT': env.int('CACHE_TIMEOUT', default=300),
+        'OPTIONS': {
+            'MAX_ENTRIES': env.int('CACHE_MAX_ENTRIES', default=10_000),
+        },
     }
 }
 
@@ -0,0 +1,157 @@
+import re
+from urllib.parse import urldefrag
+from urllib.parse import urljoin
+from urllib.parse import urlsplit
+
+from lxml import etree
+from lxml import html
+
+from load_django import ListingData
+from load_django import ProductData
+from load_django import clean_value
+
+# (group, attribute) pairs in the characteristics block that are promoted to ProductData fields
+NAMED_CHARACTERISTICS = {
+    'color': ('Фізичні характеристики', 'Колір'),
+    'ssd': ("Функції пам'яті", "Вбудована пам'ять"),
+    'manufacturer': ('Інші', 'Виробник'),
+    'screen_diagonal': ('Дисплей', 'Діагональ екрану'),
+    'resolution': ('Дисплей', 'Роздільна здатність екрану'),
+}
+
+# compiled once at import, every page reuses them
+TITLE = etree.XPath("//div[@data-section='top']//h1")
+PRICES = etree.XPath("//div[@class='br-pr-price main-price-block']//div[@class='price-wrapper']/span")
+IMAGES = etree.XPath("//div[@class='product-block-bottom']//img/@src")
+CODE = etree.XPath("//div[@data-section='top']//div[@id='product_code']//span[@class='br-pr-code-val']")
+NUM_REVIEWS = etree.XPath(
+    "//div[@id='fast-navigation-block-static']//a[@class='scroll-to-element reviews-count']/span"
+)
+CHAR_ITEMS = etree.XPath("//div[@data-section='characteristics']//div[@class='br-pr-chr-item']")
+CHAR_ITEM_TITLE = etree.XPath('.//h3')
+CHAR_ITEM_ROWS = etree.XPath('(.//div)[1]//div')
+CHAR_ROW_SPANS = etree.XPath('.//span')
+
+# category and search-result listings
+PRODUCT_URL_PATH = re.compile(r'-p\d+\.html$')
+LISTING_PRODUCT_LINKS = etree.XPath("//div[@class='br-pp-imadds']//a/@href")
+LISTING_PAGE_LINKS = etree.XPath(
+    "//link[@rel='next']/@href | //a[@rel='next']/@href | //ul[contains(@class, 'pagination')]//a/@href"
+)
+LISTING_CARDS = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' product-wrapper ')]")
+CARD_LINK = etree.XPath(".//div[@class='br-pp-imadds']//a/@href | .//div[contains(@class, 'br-pp-desc')]//a/@href")
+CARD_TITLE = etree.XPath(".//div[contains(@class, 'br-pp-desc')]//a")
+CARD_CODE = etree.XPath(".//span[contains(@class, 'product-code-num')] | .//span[@class='br-pr-code-val']")
+CARD_PRICES = etree.XPath(".//div[contains(@class, 'br-pp-price')]//span")
+CARD_REVIEWS = etree.XPath(".//a[contains(@class, 'reviews-count')]//span")
+
+
+def first_text(elements: list) -> str | None:
+    if elements and (text := elements[0].text_content().strip()):
+        return text
+    return None
+
+
+def to_int(text: str | None) -> int | None:
+    if text and (digits := text.replace(' ', '').replace('\xa0', '')).isdigit():
+        return int(digits)
+    return None
+
+
+def extract_characteristics(root: html.HtmlElement) -> dict[str, dict[str, str]]:
+    characteristics: dict[str, dict[str, str]] = {}
+    for item in CHAR_ITEMS(root):
+        if not (title := first_text(CHAR_ITEM_TITLE(item))):
+            continue
+        group = characteristics.setdefault(title, {})
+        for row in CHAR_ITEM_ROWS(item):
+            spans = CHAR_ROW_SPANS(row)
+            if len(spans) >= 2:
+                group[spans[0].text_content().strip()] = clean_value(spans[1].text_content())
+    return characteristics
+
+
+def extract_product(html_doc: str | bytes) -> ProductData:
+    root = html.fromstring(html_doc)
+    product = ProductData()
+
+    product.title = first_text(TITLE(root))
+    product.code = first_text(CODE(root))
+    product.images = [str(src) for src in IMAGES(root)]  # TODO: select only large size
+
+    prices = PRICES(root)
+    if prices:
+        product.price = to_int(prices[0].text_content())
+    if len(prices) > 1:
+        product.promo_price = to_int(prices[1].text_content())
+
+    if (num_reviews := to_int(first_text(NUM_REVIEWS(root)))) is not None:
+        product.num_reviews = num_reviews
+
+    product.characteristics = extract_characteristics(root)
+
+    def named(field_name: str) -> str | None:
+        group_name, attr_name = NAMED_CHARACTERISTICS[field_name]
+        return product.characteristics.get(group_name, {}).get(attr_name)
+
+    product.color = named('color')
+    product.ssd = named('ssd')
+    product.manufacturer = named('manufacturer')
+
+    if screen_diagonal := named('screen_diagonal'):
+        try:
+            product.screen_diagonal = float(screen_diagonal.replace('"', ''))
+        except ValueError:
+            pass
+
+    if resolution := named('resolution'):
+        product.resolution = resolution.replace(' ', '')  # TODO: maybe separate to list integers: [int, int]
+
+    return product
+
+
+def extract_listing_links(html_doc: str | bytes, base_url: str) -> tuple[list[str], list[str]]:
+    """Return absolute (product page urls, further listing page urls) linked from a category or search page."""
+    root = html.fromstring(html_doc)
+
+    product_urls: dict[str, None] = {}
+    for href in LISTING_PRODUCT_LINKS(root):
+        url = urljoin(base_url, str(href))
+        if PRODUCT_URL_PATH.search(urlsplit(url).path):
+            # product pages are identified by their path alone, tracking parameters are dropped
+            product_urls[urlsplit(url)._replace(query='', fragment='').geturl()] = None
+
+    listing_urls: dict[str, None] = {}
+    for href in LISTING_PAGE_LINKS(root):
+        url, _ = urldefrag(urljoin(base_url, str(href)))
+        if url != base_url and not url.startswith('javascript:'):
+            listing_urls[url] = None
+
+    return list(product_urls), list(listing_urls)
+
+
+def extract_listing(html_doc: str | bytes, base_url: str) -> list[ListingData]:
+    """Read code, title, prices and review count from every product card of a category or search page."""
+    root = html.fromstring(html_doc)
+    items: list[ListingData] = []
+    for card in LISTING_CARDS(root):
+        item = ListingData(code=first_text(CARD_CODE(card)), title=first_text(CARD_TITLE(card)))
+        if links := CARD_LINK(card):
+            item.url = urlsplit(urljoin(base_url, str(links[0])))._replace(query='', fragment='').geturl()
+        prices = [price for span in CARD_PRICES(card) if (price := to_int(span.text_content())) is not None]
+        if prices:
+            item.price = prices[0]
+        if len(prices) > 1:
+            item.promo_price = prices[1]
+        item.num_reviews = to_int(first_text(CARD_REVIEWS(card)))
+        items.append(item)
+    return items
+
+
+__all__ = [
+    'extract_characteristics',
+    'extract_listing',
+    'extract_listing_links',
+    'extract_product',
+    'NAMED_CHARACTERISTICS',
+]
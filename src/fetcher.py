@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:133.0) Gecko/20100101 Firefox/133.0',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Referer': 'https://www.google.com/',
+    'Connection': 'keep-alive',
+    'Cache-Control': 'no-cache',
+    'Pragma': 'no-cache',
+    'Upgrade-Insecure-Requests': '1',
+    'DNT': '1',  # Do Not Track
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'same-origin',
+    'Sec-Fetch-User': '?1',
+    'TE': 'Trailers',  # Transfer Encoding
+}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int | None = None
+    text: str | None = None
+    error: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.text is not None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class Fetcher:
+    def __init__(
+        self,
+        headers: dict[str, str] | None = None,
+        workers: int = 16,
+        per_host: int = 4,
+        timeout: tuple[float, float] = (5.0, 30.0),
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        # one keep-alive pool shared by all worker threads
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+    def __enter__(self) -> 'Fetcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    @contextmanager
+    def _host_slot(self, url: str) -> Iterator[None]:
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with slot:
+            yield
+
+    @staticmethod
+    def _retry_after(value: str) -> float | None:
+        """Seconds to wait from a Retry-After header, given either as seconds or as an HTTP date."""
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def _delay(self, attempt: int, response: requests.Response | None = None) -> float:
+        # a server asking for an hour's pause would hold a worker for the hour, waits are capped at max_backoff
+        if (
+            response is not None
+            and (retry_after := self._retry_after(response.headers.get('Retry-After', ''))) is not None
+        ):
+            return min(retry_after, self.max_backoff)
+        return min(self.backoff * 2**attempt + random.uniform(0, self.backoff), self.max_backoff)
+
+    def fetch(self, url: str, etag: str | None = None, last_modified: str | None = None) -> FetchResult:
+        conditional = {}
+        if etag:
+            conditional['If-None-Match'] = etag
+        if last_modified:
+            conditional['If-Modified-Since'] = last_modified
+
+        result = FetchResult(url)
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                with self._host_slot(url):
+                    response = self.session.get(url, headers=conditional, timeout=self.timeout)
+                result = FetchResult(
+                    url,
+                    response.status_code,
+                    response.text,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    return result
+            except requests.RequestException as e:
+                result = FetchResult(url, error=str(e))
+
+            if attempt < self.retries:
+                time.sleep(self._delay(attempt, response))
+        return result
+
+    def fetch_all(
+        self, urls: Iterable[str], validators: Mapping[str, tuple[str | None, str | None]] | None = None
+    ) -> Iterator[FetchResult]:
+        """Fetch urls concurrently and yield results as they finish, keeping a bounded number in flight.
+
+        `validators` maps a url to its stored (etag, last_modified); it is read when the url is submitted.
+        """
+        urls = iter(urls)
+        validators = validators if validators is not None else {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fetch') as pool:
+            pending: set[Future[FetchResult]] = set()
+            while True:
+                for url in urls:
+                    pending.add(pool.submit(self.fetch, url, *validators.get(url, (None, None))))
+                    if len(pending) >= self.workers * 2:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+__all__ = [
+    'DEFAULT_HEADERS',
+    'FetchResult',
+    'Fetcher',
+]
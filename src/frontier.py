@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+DEFAULT_FRONTIER_PATH = os.environ.get('FRONTIER_PATH', os.path.join(os.path.dirname(__file__), 'frontier.sqlite3'))
+
+LISTING = 'listing'
+PRODUCT = 'product'
+
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    added_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frontier_next ON frontier (kind, state, priority DESC, added_at);
+"""
+
+
+class Frontier:
+    """Persistent, deduplicating queue of urls to crawl, ordered by priority and then by age."""
+
+    def __init__(self, path: str | Path = DEFAULT_FRONTIER_PATH, max_attempts: int = 3) -> None:
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        # resume after a crash: urls claimed by the previous run but never finished go back to the queue
+        self._conn.execute('UPDATE frontier SET state = ? WHERE state = ?', (PENDING, IN_PROGRESS))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def add(self, urls: Iterable[str], kind: str, priority: int = 0, requeue: bool = False) -> int:
+        """Queue urls that were never seen before, returning how many rows changed.
+
+        With `requeue`, urls that were already finished are queued again as well.
+        """
+        now = time.time()
+        on_conflict = f"DO UPDATE SET state = '{PENDING}', attempts = 0, updated_at = excluded.updated_at " + (
+            f"WHERE state IN ('{DONE}', '{FAILED}')" if requeue else 'WHERE 0'
+        )
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT INTO frontier (url, kind, priority, added_at, updated_at) VALUES (?, ?, ?, ?, ?) '
+                f'ON CONFLICT (url) {on_conflict}',
+                ((url, kind, priority, now, now) for url in urls),
+            )
+            return self._conn.total_changes - before
+
+    def claim(self, kind: str, limit: int) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                UPDATE frontier SET state = ?, attempts = attempts + 1, updated_at = ?
+                WHERE url IN (
+                    SELECT url FROM frontier WHERE kind = ? AND state = ? ORDER BY priority DESC, added_at LIMIT ?
+                )
+                RETURNING url
+                """,
+                (IN_PROGRESS, time.time(), kind, PENDING, limit),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def done(self, urls: Iterable[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE frontier SET state = ?, updated_at = ? WHERE url = ?', ((DONE, now, url) for url in urls)
+            )
+
+    def failed(self, urls: Iterable[str]) -> None:
+        """Put urls back in the queue, or park them as failed once they ran out of attempts."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'UPDATE frontier SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, updated_at = ? WHERE url = ?',
+                ((self.max_attempts, FAILED, PENDING, now, url) for url in urls),
+            )
+
+    def requeue(self, kind: str | None = None) -> int:
+        """Queue finished urls again for a fresh pass, keeping their priorities."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE frontier SET state = ?, attempts = 0, updated_at = ? '
+                'WHERE state IN (?, ?) AND kind = COALESCE(?, kind)',
+                (PENDING, time.time(), DONE, FAILED, kind),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        with self._lock:
+            rows = self._conn.execute('SELECT kind, state, COUNT(*) FROM frontier GROUP BY kind, state').fetchall()
+        return {(kind, state): count for kind, state, count in rows}
+
+
+__all__ = [
+    'DEFAULT_FRONTIER_PATH',
+    'LISTING',
+    'PRODUCT',
+    'Frontier',
+]
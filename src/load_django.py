@@ -1,13 +1,87 @@
+import hashlib
+import json
 import os
 import re
 import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import asdict
 from dataclasses import dataclass
 from dataclasses import field
+from functools import partial
+from itertools import batched
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from products.models import Product
 
+PRODUCT_FIELDS = [
+    'title',
+    'color',
+    'ssd',
+    'manufacturer',
+    'price',
+    'promo_price',
+    'code',
+    'num_reviews',
+    'screen_diagonal',
+    'resolution',
+    'characteristics',
+]
+
+# columns the products table declares NOT NULL, the ones read from characteristics are nullable: most
+# non-phone products have no screen resolution or built-in memory
+REQUIRED_FIELDS = [
+    'title',
+    'code',
+    'num_reviews',
+    'screen_diagonal',
+]
+
+# a single number with an optional unit: '128 Gb', '6.1"', '120 Гц', '12'
+NUMBER_WITH_UNIT = re.compile(r'^(?P<number>-?\d+(?:\.\d+)?)\s*(?P<unit>[^\W\d_]+|"|%)?$')
+
+# lower-cased unit spellings -> (canonical unit, factor), so '1 Tb' and '256 Gb' compare as 1024 and 256 GB
+UNITS = {
+    'gb': ('GB', 1),
+    'гб': ('GB', 1),
+    'tb': ('GB', 1024),
+    'тб': ('GB', 1024),
+    'mb': ('GB', 1 / 1024),
+    'мб': ('GB', 1 / 1024),
+    'hz': ('Hz', 1),
+    'гц': ('Hz', 1),
+    'khz': ('Hz', 1e3),
+    'кгц': ('Hz', 1e3),
+    'mhz': ('Hz', 1e6),
+    'мгц': ('Hz', 1e6),
+    'ghz': ('Hz', 1e9),
+    'ггц': ('Hz', 1e9),
+    'мм': ('mm', 1),
+    'mm': ('mm', 1),
+    'см': ('mm', 10),
+    'cm': ('mm', 10),
+    'г': ('g', 1),
+    'кг': ('g', 1000),
+    'kg': ('g', 1000),
+    '"': ('in', 1),
+    'дюйм': ('in', 1),
+    'mpx': ('Mpx', 1),
+    'мп': ('Mpx', 1),
+    'mp': ('Mpx', 1),
+    'mah': ('mAh', 1),
+    'мач': ('mAh', 1),
+    'вт': ('W', 1),
+    'w': ('W', 1),
+    'год': ('h', 1),
+    'h': ('h', 1),
+    '%': ('%', 1),
+}
+
 
 @dataclass
 class ProductData:
@@ -23,55 +97,444 @@ class ProductData:
     screen_diagonal: float = 0.0
     resolution: str | None = None
     characteristics: dict = field(default_factory=dict)
+    url: str | None = None
 
 
-def __init_django_project() -> None:
-    import django
+@dataclass
+class ListingData:
+    code: str | None = None
+    title: str | None = None
+    price: int | None = None
+    promo_price: int | None = None
+    num_reviews: int | None = None
+    url: str | None = None
+
 
-    sys.path.append(os.path.join(os.path.dirname(__file__)))
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
-    django.setup()
+@dataclass
+class Fingerprint:
+    etag: str | None = None
+    last_modified: str | None = None
+    data_hash: str | None = None
 
 
-def __get_or_create_product(data: ProductData):
-    from products.models import Product
+@dataclass
+class SyncStats:
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
 
-    product, _ = Product.objects.get_or_create(
-        title=data.title,
-        color=data.color,
-        ssd=data.ssd,
-        manufacturer=data.manufacturer,
-        price=data.price,
-        promo_price=data.promo_price,
-        code=data.code,
-        num_reviews=data.num_reviews,
-        screen_diagonal=data.screen_diagonal,
-        resolution=data.resolution,
-    )
-    return product
+    def __add__(self, other: 'SyncStats') -> 'SyncStats':
+        return SyncStats(self.inserted + other.inserted, self.updated + other.updated, self.deleted + other.deleted)
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated + self.deleted
+
+
+@dataclass
+class IngestStats:
+    products: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    churn: SyncStats = field(default_factory=SyncStats)
+    # urls of records whose batch failed to commit, worth retrying unlike the skipped ones
+    failed_urls: list[str] = field(default_factory=list)
+
+    def __add__(self, other: 'IngestStats') -> 'IngestStats':
+        return IngestStats(
+            self.products + other.products,
+            self.unchanged + other.unchanged,
+            self.skipped + other.skipped,
+            self.rows + other.rows,
+            self.seconds + other.seconds,
+            self.churn + other.churn,
+            self.failed_urls + other.failed_urls,
+        )
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class AttributeCache:
+    """Process-wide LRU mapping of (group_name, attr_name) to attribute ids."""
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.maxsize = maxsize
+        self.warmed = False
+        self._groups: OrderedDict[str, uuid.UUID] = OrderedDict()
+        self._attributes: OrderedDict[tuple[str, str], uuid.UUID] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        from products.models import Attribute
+
+        rows = Attribute.objects.values_list('group__name', 'group_id', 'name', 'id')[: self.maxsize]
+        with self._lock:
+            for group_name, group_id, attr_name, attribute_id in rows:
+                self._put(self._groups, group_name, group_id)
+                self._put(self._attributes, (group_name, attr_name), attribute_id)
+            self.warmed = True
+
+    def get_group(self, group_name: str) -> uuid.UUID | None:
+        with self._lock:
+            return self._get(self._groups, group_name)
+
+    def get(self, group_name: str, attr_name: str) -> uuid.UUID | None:
+        with self._lock:
+            return self._get(self._attributes, (group_name, attr_name))
+
+    def update(self, groups: dict[str, uuid.UUID], attributes: dict[tuple[str, str], uuid.UUID]) -> None:
+        with self._lock:
+            for group_name, group_id in groups.items():
+                self._put(self._groups, group_name, group_id)
+            for key, attribute_id in attributes.items():
+                self._put(self._attributes, key, attribute_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._groups.clear()
+            self._attributes.clear()
+            self.warmed = False
 
+    def __len__(self) -> int:
+        return len(self._attributes)
 
-def __save_images(product: Product, image_urls: list[str]) -> None:
+    @staticmethod
+    def _get(cache: OrderedDict, key):
+        if (value := cache.get(key)) is not None:
+            cache.move_to_end(key)
+        return value
+
+    def _put(self, cache: OrderedDict, key, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.maxsize:
+            cache.popitem(last=False)
+
+
+attribute_cache = AttributeCache()
+
+_django_lock = threading.Lock()
+_django_ready = False
+
+
+def setup_django() -> None:
+    """Configure Django on first use, later calls only check a flag."""
+    global _django_ready
+
+    if _django_ready:
+        return
+    with _django_lock:
+        if _django_ready:
+            return
+
+        import django
+        from django.apps import apps
+
+        if (project_dir := os.path.dirname(os.path.abspath(__file__))) not in sys.path:
+            sys.path.append(project_dir)
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
+        # manage.py commands import this module with the app registry already populated
+        if not apps.ready:
+            django.setup()
+        _django_ready = True
+
+
+def __product_fields(data: ProductData) -> dict:
+    return {name: getattr(data, name) for name in PRODUCT_FIELDS}
+
+
+def __skip_unchanged(
+    batch: list[ProductData], hashes: dict[str, str]
+) -> tuple[list[ProductData], dict[str, uuid.UUID]]:
+    """Split off records whose content hash matches their page's fingerprint, returning (changed, {code: id}).
+
+    A fingerprint only vouches for a page while its product exists: deleting the product cascades to it.
+    """
+    from products.models import PageFingerprint
+
+    stored = {
+        url: (data_hash, product_id)
+        for url, data_hash, product_id in PageFingerprint.objects.filter(
+            url__in=hashes, product__isnull=False
+        ).values_list('url', 'data_hash', 'product_id')
+    }
+    unchanged = {
+        data.code: stored[data.url][1]
+        for data in batch
+        if data.url in stored and stored[data.url][0] == hashes[data.url]
+    }
+    return [data for data in batch if data.code not in unchanged], unchanged
+
+
+def __save_fingerprints(
+    batch: list[ProductData],
+    hashes: dict[str, str],
+    fingerprints: dict[str, Fingerprint],
+    product_ids: dict[str, uuid.UUID],
+) -> None:
+    from products.models import PageFingerprint
+
+    # fingerprints are written in the same transaction as the product, so a failed batch is retried next run;
+    # records that were not fetched just now (e.g. re-parsed from the archive) keep their stored validators
+    fetched: list[PageFingerprint] = []
+    reparsed: list[PageFingerprint] = []
+    for data in batch:
+        if not data.url:
+            continue
+        fields = {'url': data.url, 'data_hash': hashes[data.url], 'product_id': product_ids[data.code]}
+        if fp := fingerprints.pop(data.url, None):
+            fetched.append(PageFingerprint(etag=fp.etag, last_modified=fp.last_modified, **fields))
+        else:
+            reparsed.append(PageFingerprint(**fields))
+    for objs, update_fields in (
+        (fetched, ['etag', 'last_modified', 'data_hash', 'product', 'checked_at']),
+        (reparsed, ['data_hash', 'product', 'checked_at']),
+    ):
+        PageFingerprint.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=['url'], update_fields=update_fields
+        )
+
+
+def __sync_images(images: dict[uuid.UUID, list[str]]) -> SyncStats:
     from products.models import ProductImage
 
-    ProductImage.objects.filter(product=product).delete()
-    ProductImage.objects.bulk_create([ProductImage(product=product, url=url) for url in image_urls])
+    incoming = {(product_id, url) for product_id, urls in images.items() for url in urls}
+    stored: set[tuple[uuid.UUID, str]] = set()
+    stale: list[uuid.UUID] = []
+    for image_id, product_id, url in ProductImage.objects.filter(product_id__in=images).values_list(
+        'id', 'product_id', 'url'
+    ):
+        if (product_id, url) in stored or (product_id, url) not in incoming:
+            stale.append(image_id)
+        else:
+            stored.add((product_id, url))
+
+    new = [ProductImage(product_id=product_id, url=url) for product_id, url in incoming - stored]
+    ProductImage.objects.filter(id__in=stale).delete()
+    ProductImage.objects.bulk_create(new)
+    return SyncStats(inserted=len(new), deleted=len(stale))
+
+
+def __typed_value(value: str) -> dict:
+    value_num, value_unit = parse_value(value)
+    return {'value_num': value_num, 'value_unit': value_unit}
+
+
+def __sync_values(product_ids: Iterable[uuid.UUID], values: dict[tuple[uuid.UUID, uuid.UUID], str]) -> SyncStats:
+    from products.facets import apply_facet_deltas
+    from products.models import AttributeValue
+
+    stored: dict[tuple[uuid.UUID, uuid.UUID], tuple[uuid.UUID, str]] = {}
+    stale: list[uuid.UUID] = []
+    # (attribute_id, value) -> change in the number of products carrying it
+    facets: Counter[tuple[uuid.UUID, str]] = Counter()
+    for value_id, product_id, attribute_id, value in AttributeValue.objects.filter(
+        product_id__in=product_ids
+    ).values_list('id', 'product_id', 'attribute_id', 'value'):
+        if (key := (product_id, attribute_id)) in stored or key not in values:
+            stale.append(value_id)
+            facets[(attribute_id, value)] -= 1
+        else:
+            stored[key] = (value_id, value)
+
+    changed: list[AttributeValue] = []
+    for (product_id, attribute_id), (value_id, value) in stored.items():
+        if (new_value := values[(product_id, attribute_id)]) != value:
+            changed.append(AttributeValue(id=value_id, value=new_value, **__typed_value(new_value)))
+            facets[(attribute_id, value)] -= 1
+            facets[(attribute_id, new_value)] += 1
+    new = [
+        AttributeValue(product_id=product_id, attribute_id=attribute_id, value=value, **__typed_value(value))
+        for (product_id, attribute_id), value in values.items()
+        if (product_id, attribute_id) not in stored
+    ]
+    facets.update((value.attribute_id, value.value) for value in new)
+
+    AttributeValue.objects.filter(id__in=stale).delete()
+    AttributeValue.objects.bulk_update(changed, ['value', 'value_num', 'value_unit'])
+    AttributeValue.objects.bulk_create(new)
+    apply_facet_deltas(facets)
+    return SyncStats(inserted=len(new), updated=len(changed), deleted=len(stale))
+
+
+def __upsert_products(batch: list[ProductData]) -> dict[str, Product]:
+    from products.models import Product
+
+    # INSERT ... ON CONFLICT (code) DO UPDATE, then one index probe to read back the ids of updated rows
+    Product.objects.bulk_create(
+        [Product(**__product_fields(data)) for data in batch],
+        update_conflicts=True,
+        unique_fields=['code'],
+        update_fields=[name for name in PRODUCT_FIELDS if name != 'code'],
+    )
+    return Product.objects.in_bulk([data.code for data in batch], field_name='code')
+
 
+def __resolve_attributes(names: set[tuple[str, str]]) -> dict[tuple[str, str], uuid.UUID]:
+    from django.db import transaction
 
-def __save_characteristics(product: Product, characteristics: dict) -> None:
     from products.models import Attribute
     from products.models import AttributeGroup
-    from products.models import AttributeValue
 
-    values: list[AttributeValue] = []
-    for group_name, attributes in characteristics.items():
-        group, _ = AttributeGroup.objects.get_or_create(name=group_name)
-        for attr_name, attr_value in attributes.items():
-            attribute, _ = Attribute.objects.get_or_create(group=group, name=attr_name)
-            values.append(AttributeValue(attribute=attribute, product=product, value=attr_value))
+    if not attribute_cache.warmed:
+        attribute_cache.warm()
+
+    resolved = {key: attribute_id for key in names if (attribute_id := attribute_cache.get(*key)) is not None}
+    if not (missing := names - resolved.keys()):
+        return resolved
+
+    group_names = {group_name for group_name, _ in missing}
+    groups = {name: group_id for name in group_names if (group_id := attribute_cache.get_group(name)) is not None}
+    if unknown_groups := group_names - groups.keys():
+        groups.update(AttributeGroup.objects.filter(name__in=unknown_groups).values_list('name', 'id'))
+        if new_names := unknown_groups - groups.keys():
+            # another writer may create the same group first, the unique name decides and its id is read back
+            AttributeGroup.objects.bulk_create(
+                [AttributeGroup(name=name) for name in new_names], ignore_conflicts=True
+            )
+            groups.update(AttributeGroup.objects.filter(name__in=new_names).values_list('name', 'id'))
+
+    group_names_by_id = {group_id: name for name, group_id in groups.items()}
+
+    def lookup() -> None:
+        for group_id, attr_name, attribute_id in Attribute.objects.filter(
+            group_id__in=group_names_by_id, name__in={attr_name for _, attr_name in missing}
+        ).values_list('group_id', 'name', 'id'):
+            if (key := (group_names_by_id[group_id], attr_name)) in missing:
+                resolved[key] = attribute_id
+
+    lookup()
+    if new_keys := missing - resolved.keys():
+        Attribute.objects.bulk_create(
+            [Attribute(group_id=groups[group_name], name=attr_name) for group_name, attr_name in new_keys],
+            ignore_conflicts=True,
+        )
+        lookup()
+
+    # rows created inside a transaction that later rolls back must never reach the cache
+    transaction.on_commit(partial(attribute_cache.update, groups, resolved))
+    return resolved
+
+
+def __stored_prices(codes: list[str]) -> dict[str, tuple[int | None, int | None]]:
+    from products.models import Product
+
+    return {
+        code: (price, promo_price)
+        for code, price, promo_price in Product.objects.filter(code__in=codes).values_list(
+            'code', 'price', 'promo_price'
+        )
+    }
+
+
+def __save_batch(batch: list[ProductData]) -> tuple[dict[str, uuid.UUID], SyncStats]:
+    from products.prices import record_prices
+    from products.search import update_search_vectors
+
+    # read before the upsert overwrites them, new products have no stored price and are always recorded
+    stored_prices = __stored_prices([data.code for data in batch])
+    products = __upsert_products(batch)
+    update_search_vectors(product.id for product in products.values())
+    record_prices(
+        {
+            products[data.code].id: (data.price, data.promo_price)
+            for data in batch
+            if stored_prices.get(data.code) != (data.price, data.promo_price)
+        }
+    )
+    attribute_ids = __resolve_attributes(
+        {
+            (group_name, attr_name)
+            for data in batch
+            for group_name, attrs in data.characteristics.items()
+            for attr_name in attrs
+        }
+    )
+
+    images = {products[data.code].id: data.images for data in batch}
+    values = {
+        (products[data.code].id, attribute_ids[(group_name, attr_name)]): attr_value
+        for data in batch
+        for group_name, attrs in data.characteristics.items()
+        for attr_name, attr_value in attrs.items()
+    }
+    product_ids = {code: product.id for code, product in products.items()}
+    return product_ids, __sync_images(images) + __sync_values(images.keys(), values)
+
+
+def product_hash(data: ProductData) -> str:
+    fields = asdict(data)
+    del fields['url']
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def load_fingerprints(urls: Iterable[str]) -> dict[str, Fingerprint]:
+    setup_django()
+
+    from products.models import PageFingerprint
+
+    return {
+        url: Fingerprint(etag, last_modified, data_hash)
+        # without a product behind it a 304 would keep a deleted product from ever being re-created
+        for url, etag, last_modified, data_hash in PageFingerprint.objects.filter(
+            url__in=list(urls), product__isnull=False
+        ).values_list('url', 'etag', 'last_modified', 'data_hash')
+    }
+
+
+def update_listing_prices(items: list[ListingData]) -> list[ListingData]:
+    """Refresh price, promo_price and num_reviews of known products from listing cards with one batched UPDATE.
+
+    Returns the cards whose product page still has to be opened: unknown codes and cards that disagree with the
+    stored product (different title or no readable price).
+    """
+    setup_django()
 
-    AttributeValue.objects.filter(product=product).delete()
-    AttributeValue.objects.bulk_create(values)
+    from django.db import transaction
+
+    from products.cache import invalidate_products
+    from products.models import PageFingerprint
+    from products.models import Product
+    from products.prices import record_prices
+
+    by_code = {item.code: item for item in items if item.code}
+    needs_page = [item for item in items if not item.code]
+    to_update: list[Product] = []
+    # prices before this listing, a card may only refresh num_reviews
+    prices: dict[str, tuple[int | None, int | None]] = {}
+    stored = Product.objects.filter(code__in=by_code).only('code', 'title', 'price', 'promo_price', 'num_reviews')
+    for product in stored:
+        item = by_code.pop(product.code)
+        if item.price is None or (item.title and item.title != product.title):
+            needs_page.append(item)
+            continue
+        num_reviews = product.num_reviews if item.num_reviews is None else item.num_reviews
+        prices[product.code] = (product.price, product.promo_price)
+        if (product.price, product.promo_price, product.num_reviews) != (item.price, item.promo_price, num_reviews):
+            product.price, product.promo_price, product.num_reviews = item.price, item.promo_price, num_reviews
+            to_update.append(product)
+    needs_page.extend(by_code.values())
+
+    with transaction.atomic():
+        # a single UPDATE ... SET price = CASE id WHEN ... for the whole listing page
+        Product.objects.bulk_update(
+            to_update, ['price', 'promo_price', 'num_reviews'], batch_size=len(to_update) or None
+        )
+        record_prices(
+            {
+                product.id: (product.price, product.promo_price)
+                for product in to_update
+                if (product.price, product.promo_price) != prices[product.code]
+            }
+        )
+        # the product page no longer matches the row, neither its hash nor a 304 may skip it next time
+        PageFingerprint.objects.filter(product__in=to_update).delete()
+    invalidate_products([product.code for product in to_update])
+    return needs_page
 
 
 def clean_value(value: str) -> str:
@@ -81,24 +544,160 @@ def clean_value(value: str) -> str:
     return value.strip()
 
 
-def save_product(data: ProductData) -> None:
-    __init_django_project()
+def parse_value(value: str) -> tuple[float | None, str | None]:
+    """Split a cleaned characteristic into (number, canonical unit) for range filters, (None, None) for text."""
+    if not (match := NUMBER_WITH_UNIT.match(value)):
+        return None, None
+    number = float(match['number'])
+    if not (unit := match['unit']):
+        return number, None
+    # unknown units are not comparable with anything: '5G' is a network, not five grams
+    if (known := UNITS.get(unit.lower())) is None:
+        return None, None
+    canonical, factor = known
+    return number * factor, canonical
+
+
+def has_required_fields(data: ProductData) -> bool:
+    """False for records the products table would reject, they are dropped instead of failing their batch."""
+    return all(getattr(data, name) is not None for name in REQUIRED_FIELDS)
+
+
+def save_product(data: ProductData) -> SyncStats:
+    setup_django()
 
     from django.db import DatabaseError
     from django.db import IntegrityError
-    from django.db import transaction
+
+    if not has_required_fields(data):
+        print('Skipped product without code or a required field\n')
+        return SyncStats()
 
     try:
-        with transaction.atomic():
-            product = __get_or_create_product(data)
-            __save_images(product, data.images)
-            __save_characteristics(product, data.characteristics)
+        stats = write_batch([data], {})
     except (IntegrityError, DatabaseError) as e:
+        attribute_cache.invalidate()
         print(f'Failed to save product: {e}\n')
+        return SyncStats()
+    if stats.unchanged:
+        print(f'Product {data.code} is unchanged\n')
+    return stats.churn
+
+
+def write_batch(batch: list[ProductData], fingerprints: dict[str, Fingerprint]) -> IngestStats:
+    """Write one batch of products with distinct codes in a single transaction."""
+    setup_django()
+
+    from django.db import transaction
+
+    from products.cache import invalidate_products
+
+    started = time.perf_counter()
+    hashes = {data.url: product_hash(data) for data in batch if data.url}
+    with transaction.atomic():
+        changed, product_ids = __skip_unchanged(batch, hashes)
+        churn = SyncStats()
+        if changed:
+            saved_ids, churn = __save_batch(changed)
+            product_ids |= saved_ids
+        __save_fingerprints(batch, hashes, fingerprints, product_ids)
+        # the API keeps serving cached responses until the new rows are visible
+        transaction.on_commit(partial(invalidate_products, [data.code for data in changed]))
+    return IngestStats(
+        products=len(changed),
+        unchanged=len(batch) - len(changed),
+        rows=len(changed) + churn.rows,
+        seconds=time.perf_counter() - started,
+        churn=churn,
+    )
+
+
+class ProductWriter:
+    """Long-lived ingestion session: Django is set up once and one database connection serves every batch.
+
+    Connections are only replaced when they outlive CONN_MAX_AGE or fail the CONN_HEALTH_CHECKS probe.
+    """
+
+    def __init__(self, batch_size: int = 500) -> None:
+        setup_django()
+
+        self.batch_size = batch_size
+        self.stats = IngestStats()
+
+    def __enter__(self) -> 'ProductWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.report()
+
+    def write(self, items: Iterable[ProductData], fingerprints: dict[str, Fingerprint] | None = None) -> IngestStats:
+        """Write products in batches, skipping records whose content hash matches the stored fingerprint of their url.
+
+        `fingerprints` carries the ETag/Last-Modified of freshly fetched urls; entries are consumed as they are stored.
+        """
+        from django.db import DatabaseError
+        from django.db import IntegrityError
+        from django.db import close_old_connections
+
+        fingerprints = fingerprints if fingerprints is not None else {}
+        stats = IngestStats()
+        for chunk in batched(items, self.batch_size):
+            # one record the table rejects would roll back the whole batch, so they are dropped up front
+            valid = [data for data in chunk if has_required_fields(data)]
+            if invalid := len(chunk) - len(valid):
+                print(f'Skipped {invalid} products without code or a required field\n')
+            # products are matched by their store code, the last record in a batch wins
+            batch = list({data.code: data for data in valid}.values())
+            stats.skipped += len(chunk) - len(batch)
+            if not batch:
+                continue
+            # outside the request cycle nothing else retires expired or broken connections
+            close_old_connections()
+            try:
+                stats += write_batch(batch, fingerprints)
+            except (IntegrityError, DatabaseError) as e:
+                attribute_cache.invalidate()
+                print(f'Failed to save batch of {len(batch)} products: {e}\n')
+                stats.failed_urls.extend(data.url for data in batch if data.url)
+        self.stats += stats
+        return stats
+
+    def report(self) -> None:
+        stats = self.stats
+        print(
+            f'Saved {stats.products} products ({stats.rows} rows), skipped {stats.unchanged} unchanged '
+            f'and {stats.skipped} invalid or duplicated, {len(stats.failed_urls)} failed '
+            f'in {stats.seconds:.2f}s, {stats.rows_per_second:.0f} rows/s; '
+            f'child rows inserted {stats.churn.inserted}, updated {stats.churn.updated}, deleted {stats.churn.deleted}'
+        )
+
+
+def save_products(
+    items: Iterable[ProductData], batch_size: int = 500, fingerprints: dict[str, Fingerprint] | None = None
+) -> IngestStats:
+    with ProductWriter(batch_size) as writer:
+        return writer.write(items, fingerprints)
 
 
 __all__ = [
+    'attribute_cache',
     'clean_value',
+    'has_required_fields',
+    'load_fingerprints',
+    'parse_value',
+    'product_hash',
     'save_product',
+    'save_products',
+    'setup_django',
+    'update_listing_prices',
+    'write_batch',
+    'AttributeCache',
+    'Fingerprint',
+    'IngestStats',
+    'ListingData',
     'ProductData',
+    'ProductWriter',
+    'SyncStats',
+    'PRODUCT_FIELDS',
+    'REQUIRED_FIELDS',
 ]
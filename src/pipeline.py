@@ -0,0 +1,186 @@
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from dataclasses import asdict
+from dataclasses import dataclass
+from pprint import pprint
+from typing import Protocol
+
+from extractor import extract_product
+from load_django import Fingerprint
+from load_django import IngestStats
+from load_django import ProductData
+from load_django import save_products
+
+# marks the end of a stage's output
+DONE = None
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    html: str
+    fingerprint: Fingerprint | None = None
+
+
+class FetchBackend(Protocol):
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]: ...
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    items: int = 0
+    errors: int = 0
+
+    def rate(self, elapsed: float) -> float:
+        return self.items / elapsed if elapsed else 0.0
+
+
+def parse_page(url: str, html_doc: str) -> ProductData:
+    try:
+        product = extract_product(html_doc)
+    except Exception as e:
+        # lxml errors carry a parser log that cannot be pickled back to the parent process
+        raise ValueError(f'{url}: {e}') from None
+    product.url = url
+    return product
+
+
+class Pipeline:
+    """Fetch (backend threads) -> parse (process pool) -> write (batched save_products), joined by bounded queues.
+
+    A full queue blocks the stage feeding it, so a slow database throttles parsing and parsing throttles fetching.
+    """
+
+    def __init__(
+        self,
+        backend: FetchBackend,
+        parse_workers: int | None = None,
+        queue_size: int = 256,
+        batch_size: int = 500,
+        report_every: float = 30.0,
+        verbose: bool = False,
+    ) -> None:
+        self.backend = backend
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.report_every = report_every
+        self.verbose = verbose
+
+        self.pages: queue.Queue[FetchedPage | None] = queue.Queue(maxsize=queue_size)
+        self.products: queue.Queue[ProductData | None] = queue.Queue(maxsize=queue_size)
+        self.fingerprints: dict[str, Fingerprint] = {}
+        self.metrics = {name: StageMetrics(name) for name in ('fetch', 'parse', 'write')}
+        self.started = time.perf_counter()
+        self._stop = threading.Event()
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue):
+        # a stopped run reads as the end of the stream, the stage feeding `source` may never send DONE
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return DONE
+
+    def _fetch(self, jobs: Iterable[str]) -> None:
+        try:
+            for page in self.backend.pages(jobs):
+                if page.fingerprint:
+                    self.fingerprints[page.url] = page.fingerprint
+                if not self._put(self.pages, page):
+                    return
+                self.metrics['fetch'].items += 1
+        except Exception as e:
+            self.metrics['fetch'].errors += 1
+            print(f'Fetch stage failed: {e}\n')
+        finally:
+            self._put(self.pages, DONE)
+
+    def _parse(self) -> None:
+        in_flight: set[Future[ProductData]] = set()
+        max_in_flight = (self.parse_workers or os.cpu_count() or 1) * 2
+
+        def collect(futures: set[Future[ProductData]]) -> None:
+            for future in futures:
+                try:
+                    product = future.result()
+                except Exception as e:
+                    self.metrics['parse'].errors += 1
+                    print(f'Failed to parse page: {e}\n')
+                    continue
+                self._put(self.products, product)
+                self.metrics['parse'].items += 1
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+                while (page := self._get(self.pages)) is not DONE:
+                    in_flight.add(pool.submit(parse_page, page.url, page.html))
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                collect(in_flight)
+        finally:
+            self._put(self.products, DONE)
+
+    def _drain(self) -> Iterator[ProductData]:
+        while (product := self.products.get()) is not DONE:
+            if self.verbose:
+                pprint(asdict(product), width=119)
+            self.metrics['write'].items += 1
+            yield product
+
+    def _report_loop(self) -> None:
+        while not self._stop.wait(self.report_every):
+            self.report()
+
+    def report(self) -> None:
+        elapsed = time.perf_counter() - self.started
+        stages = ' | '.join(
+            f'{m.name} {m.items} ({m.rate(elapsed):.1f}/s, {m.errors} errors)' for m in self.metrics.values()
+        )
+        print(
+            f'[{elapsed:.0f}s] {stages} | queues: pages {self.pages.qsize()}/{self.pages.maxsize}, '
+            f'products {self.products.qsize()}/{self.products.maxsize}'
+        )
+
+    def run(self, jobs: Iterable[str]) -> IngestStats:
+        self.started = time.perf_counter()
+        stages = [
+            threading.Thread(target=self._fetch, args=(jobs,), name='fetch', daemon=True),
+            threading.Thread(target=self._parse, name='parse', daemon=True),
+            threading.Thread(target=self._report_loop, name='report', daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            # the ORM writer runs on the calling thread, batching whatever the parse stage delivers
+            return save_products(self._drain(), batch_size=self.batch_size, fingerprints=self.fingerprints)
+        finally:
+            self._stop.set()
+            self.report()
+
+
+__all__ = [
+    'FetchBackend',
+    'FetchedPage',
+    'Pipeline',
+    'StageMetrics',
+]
@@ -1,13 +1,151 @@
+from functools import partial
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db import transaction
+from django.db.models import Count
+from django.utils.functional import cached_property
 
+from products.cache import invalidate_products
+from products.facets import apply_facet_deltas
 from products.models import Attribute
 from products.models import AttributeGroup
 from products.models import AttributeValue
+from products.models import PageFingerprint
 from products.models import Product
 from products.models import ProductImage
+from products.prices import record_prices
+from products.search import update_search_vectors
+
+# tables estimated smaller than this are counted exactly, the estimate is off most on small and fresh tables
+EXACT_COUNT_BELOW = 10_000
+
+
+def uncount_facets(products) -> None:
+    """Take the values of products about to be deleted out of facet_counts, before the cascade removes them."""
+    counts = AttributeValue.objects.filter(product__in=products).values_list('attribute_id', 'value')
+    apply_facet_deltas({(attribute_id, value): -n for attribute_id, value, n in counts.annotate(n=Count('id'))})
+
+
+class EstimatedCountPaginator(Paginator):
+    """Page count of an unfiltered changelist from the planner's row estimate instead of COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            with connections[queryset.db].cursor() as cursor:
+                # -1 for a table that was never vacuumed or analyzed
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table]
+                )
+                estimate = cursor.fetchone()[0]
+            if estimate >= EXACT_COUNT_BELOW:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # the "N total" link runs an unfiltered COUNT(*) next to the filtered one
+    show_full_result_count = False
+
+
+class ProductImageInline(admin.TabularInline):
+    model = ProductImage
+    extra = 0
+
+
+class AttributeValueInline(admin.TabularInline):
+    """Read-only: characteristics, facet counts and search vectors are derived from values by the ingestion path."""
+
+    model = AttributeValue
+    fields = ['attribute', 'value']
+    readonly_fields = fields
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('attribute')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AttributeGroup)
+class AttributeGroupAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+
+
+@admin.register(Attribute)
+class AttributeAdmin(LargeTableAdmin):
+    list_display = ['name', 'group']
+    list_select_related = ['group']
+    search_fields = ['name']
+    autocomplete_fields = ['group']
+
+
+@admin.register(AttributeValue)
+class AttributeValueAdmin(LargeTableAdmin):
+    """Read-only, for the same reason as AttributeValueInline."""
+
+    list_display = ['product', 'attribute', 'value', 'value_num', 'value_unit']
+    # __str__ and the columns read attribute and product, join them instead of two queries per row
+    list_select_related = ['attribute', 'product']
+    # a select would render every product and attribute
+    raw_id_fields = ['product']
+    autocomplete_fields = ['attribute']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Product)
+class ProductAdmin(LargeTableAdmin):
+    list_display = ['code', 'title', 'manufacturer', 'price', 'promo_price']
+    # icontains on both runs on the UPPER(...) trigram indexes
+    search_fields = ['code', 'title']
+    inlines = [ProductImageInline, AttributeValueInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        update_search_vectors([obj.pk])
+        if not change or {'price', 'promo_price'} & set(form.changed_data):
+            record_prices({obj.pk: (obj.price, obj.promo_price)})
+            # otherwise an unchanged product page would be skipped and the edited price kept
+            PageFingerprint.objects.filter(product=obj).delete()
+        # after the inlines are saved too, the whole change form is one transaction; an edited code retires the old key
+        codes = {obj.code, form.initial.get('code', obj.code)}
+        transaction.on_commit(partial(invalidate_products, list(codes)))
+
+    def get_deleted_objects(self, objs, request):
+        deleted_objects, model_count, perms_needed, protected = super().get_deleted_objects(objs, request)
+        # values cannot be deleted on their own, but go with their product, whose deletion uncounts their facets
+        perms_needed.discard(AttributeValue._meta.verbose_name)
+        return deleted_objects, model_count, perms_needed, protected
+
+    def delete_model(self, request, obj):
+        uncount_facets([obj])
+        super().delete_model(request, obj)
+        transaction.on_commit(partial(invalidate_products, [obj.code]))
+
+    def delete_queryset(self, request, queryset):
+        # unlike the delete view, the delete action does not run in a transaction of its own
+        with transaction.atomic():
+            codes = list(queryset.values_list('code', flat=True))
+            uncount_facets(queryset)
+            super().delete_queryset(request, queryset)
+            transaction.on_commit(partial(invalidate_products, codes))
+
 
-admin.site.register(Product)
-admin.site.register(ProductImage)
-admin.site.register(AttributeGroup)
-admin.site.register(Attribute)
-admin.site.register(AttributeValue)
+@admin.register(ProductImage)
+class ProductImageAdmin(LargeTableAdmin):
+    list_display = ['url', 'product']
+    list_select_related = ['product']
+    raw_id_fields = ['product']
@@ -0,0 +1,48 @@
+import hashlib
+import time
+from collections.abc import Iterable
+
+from django.core.cache import cache
+
+# list and facet responses are keyed by this number, any catalog change moves them all to fresh keys at once
+CATALOG_VERSION_KEY = 'products:version'
+
+
+def product_key(code: str) -> str:
+    return f'products:detail:{code}'
+
+
+def list_key(name: str, *params) -> str:
+    """Key of a response that depends on many products, `params` being whatever the response varies on."""
+    digest = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()
+    return f'products:{name}:{catalog_version()}:{digest}'
+
+
+def catalog_version() -> int:
+    return cache.get_or_set(CATALOG_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def bump_catalog_version() -> None:
+    # a timestamp rather than a counter, so a version is never reused after the cache is cleared
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate_products(codes: Iterable[str]) -> None:
+    """Drop the cached detail of the given products and every cached list page."""
+    if keys := [product_key(code) for code in codes]:
+        cache.delete_many(keys)
+        bump_catalog_version()
+
+
+def invalidate_catalog() -> None:
+    """Forget every cached response, for bulk reloads that touch too many products to list."""
+    cache.clear()
+    bump_catalog_version()
+
+
+__all__ = [
+    'invalidate_catalog',
+    'invalidate_products',
+    'list_key',
+    'product_key',
+]
@@ -0,0 +1,50 @@
+import uuid
+from collections.abc import Mapping
+
+from django.db import connection
+
+# deltas are applied in key order, so two writers touching the same facets lock them in the same order
+APPLY_DELTAS = """
+INSERT INTO facet_counts (id, attribute_id, value, count)
+SELECT gen_random_uuid(), d.attribute_id, d.value, d.delta
+FROM unnest(%s::uuid[], %s::varchar[], %s::integer[]) AS d (attribute_id, value, delta)
+ORDER BY d.attribute_id, d.value
+ON CONFLICT (attribute_id, value) DO UPDATE SET count = facet_counts.count + EXCLUDED.count
+"""
+
+DELETE_EMPTY = """
+DELETE FROM facet_counts f
+USING unnest(%s::uuid[], %s::varchar[]) AS d (attribute_id, value)
+WHERE f.attribute_id = d.attribute_id AND f.value = d.value AND f.count <= 0
+"""
+
+REBUILD = """
+DELETE FROM facet_counts;
+INSERT INTO facet_counts (id, attribute_id, value, count)
+SELECT gen_random_uuid(), attribute_id, value, count(*) FROM attribute_values GROUP BY attribute_id, value;
+"""
+
+
+def apply_facet_deltas(deltas: Mapping[tuple[uuid.UUID, str], int]) -> None:
+    """Add per (attribute, value) product count changes to facet_counts, in the caller's transaction."""
+    if not (changed := sorted((key, delta) for key, delta in deltas.items() if delta)):
+        return
+    attribute_ids = [attribute_id for (attribute_id, _), _ in changed]
+    values = [value for (_, value), _ in changed]
+    with connection.cursor() as cursor:
+        cursor.execute(APPLY_DELTAS, [attribute_ids, values, [delta for _, delta in changed]])
+        if any(delta < 0 for _, delta in changed):
+            cursor.execute(DELETE_EMPTY, [attribute_ids, values])
+
+
+def rebuild_facet_counts() -> int:
+    """Recount every facet from attribute_values, for bulk loads and after deletes outside the ingestion path."""
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD)
+        return cursor.rowcount
+
+
+__all__ = [
+    'apply_facet_deltas',
+    'rebuild_facet_counts',
+]
@@ -0,0 +1,152 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+
+SEED = """
+INSERT INTO attribute_groups (id, name)
+SELECT gen_random_uuid(), 'bench group ' || g FROM generate_series(1, %(groups)s) g;
+
+INSERT INTO attributes (id, name, group_id)
+SELECT gen_random_uuid(), 'bench attribute ' || a, g.id
+FROM attribute_groups g CROSS JOIN generate_series(1, %(attributes_per_group)s) a
+WHERE g.name LIKE 'bench group %%';
+
+INSERT INTO products (id, title, color, ssd, manufacturer, price, code, num_reviews, screen_diagonal, resolution)
+SELECT gen_random_uuid(), 'Bench product ' || p, 'black', '128 Gb', 'Bench', 1000 + p %% 50000,
+       'BENCH' || lpad(p::text, 9, '0'), 0, 6.1, '1080x2400'
+FROM generate_series(1, %(products)s) p;
+
+CREATE TEMP TABLE bench_attributes ON COMMIT DROP AS
+SELECT row_number() OVER (ORDER BY id) AS n, id FROM attributes WHERE name LIKE 'bench attribute %%';
+CREATE TEMP TABLE bench_products ON COMMIT DROP AS
+SELECT row_number() OVER (ORDER BY code) AS n, id FROM products WHERE code LIKE 'BENCH%%';
+
+INSERT INTO attribute_values (id, value, attribute_id, product_id)
+SELECT gen_random_uuid(), 'value ' || (p.n + k) %% 50, a.id, p.id
+FROM bench_products p
+CROSS JOIN generate_series(0, %(values_per_product)s - 1) k
+JOIN bench_attributes a ON a.n = (p.n + k) %% %(attributes)s + 1;
+
+ANALYZE attribute_groups, attributes, products, attribute_values;
+"""
+
+# the access paths of load_django and the read side, each with a batch-sized parameter where the code uses one
+QUERIES = {
+    'products by code (500)': (
+        'SELECT id FROM products WHERE code = ANY(%s)',
+        lambda c: [[f'BENCH{n:09d}' for n in range(1, c['products'], max(c['products'] // 500, 1))][:500]],
+    ),
+    'group by name': (
+        'SELECT id FROM attribute_groups WHERE name = %s',
+        lambda c: ['bench group 7'],
+    ),
+    'attributes by group and name': (
+        'SELECT a.id FROM attributes a JOIN attribute_groups g ON g.id = a.group_id '
+        'WHERE g.name = %s AND a.name = ANY(%s)',
+        lambda c: ['bench group 7', [f'bench attribute {n}' for n in range(1, 11)]],
+    ),
+    'values by product (500)': (
+        'SELECT attribute_id, value FROM attribute_values WHERE product_id = ANY('
+        'ARRAY(SELECT id FROM products WHERE code LIKE %s ORDER BY code LIMIT 500))',
+        lambda c: ['BENCH%'],
+    ),
+    'values by attribute and value': (
+        'SELECT product_id FROM attribute_values '
+        'WHERE attribute_id = (SELECT id FROM attributes WHERE name = %s LIMIT 1) AND value = %s',
+        lambda c: ['bench attribute 3', 'value 7'],
+    ),
+}
+
+CATALOG_TABLES = ['attribute_groups', 'attributes', 'attribute_values']
+
+# every secondary index and unique constraint of the tables 0006 reworked; products.code is unique since 0003 and
+# stays in both runs
+SECONDARY_INDEXES = """
+SELECT i.indrelid::regclass::text, i.indexrelid::regclass::text, c.conname
+FROM pg_index i LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid AND c.conrelid = i.indrelid AND c.contype = 'u'
+WHERE i.indrelid = ANY(%s::regclass[]) AND NOT i.indisprimary
+"""
+
+# the foreign key indexes Django created before 0006 replaced them with composite ones
+INDEXES_0005 = """
+CREATE INDEX bench_attributes_group_id ON attributes (group_id);
+CREATE INDEX bench_attribute_values_attribute_id ON attribute_values (attribute_id);
+CREATE INDEX bench_attribute_values_product_id ON attribute_values (product_id);
+ANALYZE attribute_groups, attributes, attribute_values;
+"""
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic catalog inside a transaction, time the lookup queries against the current indexes and '
+        'against the index set of migration 0005, then roll everything back. Swapping the indexes locks the '
+        'catalog tables until the rollback: run it against a development database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--values', type=int, default=1_000_000, help='attribute_values rows to seed')
+        parser.add_argument('--values-per-product', type=int, default=40, help='attributes per product')
+        parser.add_argument('--groups', type=int, default=20, help='attribute groups')
+        parser.add_argument('--attributes-per-group', type=int, default=10, help='attributes per group')
+        parser.add_argument('--repeat', type=int, default=20, help='runs per query, the median is reported')
+
+    def time_query(self, cursor, sql: str, params: list, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def use_0005_indexes(self, cursor) -> None:
+        """Replace the indexes of 0006 and later with those of 0005, inside the benchmark's transaction."""
+        # Django's foreign keys are deferred, tables with pending checks from the seed cannot be altered
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(SECONDARY_INDEXES, [CATALOG_TABLES])
+        for table, index, constraint in cursor.fetchall():
+            if constraint:
+                cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {constraint}')
+            else:
+                cursor.execute(f'DROP INDEX {index}')
+        cursor.execute(INDEXES_0005)
+
+    def handle(self, *args, **options):
+        config = {
+            'groups': options['groups'],
+            'attributes_per_group': options['attributes_per_group'],
+            'attributes': options['groups'] * options['attributes_per_group'],
+        }
+        # each product gets distinct attributes, (product, attribute) is unique
+        config['values_per_product'] = min(options['values_per_product'], config['attributes'])
+        config['products'] = max(options['values'] // config['values_per_product'], 1)
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                started = time.perf_counter()
+                cursor.execute(SEED, config)
+                self.stdout.write(
+                    f'Seeded {config["products"]} products and {config["products"] * config["values_per_product"]} '
+                    f'attribute values in {time.perf_counter() - started:.1f}s'
+                )
+
+                results = {}
+                for label, (sql, params) in QUERIES.items():
+                    results[label] = [self.time_query(cursor, sql, params(config), options['repeat'])]
+                self.use_0005_indexes(cursor)
+                for label, (sql, params) in QUERIES.items():
+                    results[label].append(self.time_query(cursor, sql, params(config), options['repeat']))
+
+                self.stdout.write(f'\n{"query":<32}{"0005 ms":>14}{"current ms":>14}{"speedup":>10}')
+                for label, (current, before) in results.items():
+                    self.stdout.write(f'{label:<32}{before:>14.2f}{current:>14.2f}{before / current:>9.1f}x')
+                raise Rollback
+        except Rollback:
+            self.stdout.write('\nRolled back the synthetic catalog')
@@ -0,0 +1,42 @@
+import json
+from collections.abc import Iterator
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from archive import DEFAULT_ARCHIVE_DIR
+from archive import HtmlArchive
+from archive import reparse
+from copy_loader import copy_products
+from load_django import ProductData
+
+
+def read_jsonl(paths: list[str]) -> Iterator[ProductData]:
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield ProductData(**json.loads(line))
+
+
+class Command(BaseCommand):
+    help = 'Bulk load products with COPY, from JSONL files of ProductData records or from the raw HTML archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('jsonl', nargs='*', help='files with one ProductData JSON object per line')
+        parser.add_argument(
+            '--from-archive', action='store_true', help='re-parse the latest archived page of every url instead'
+        )
+        parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR, help='directory of the raw HTML archive')
+        parser.add_argument('--processes', type=int, help='parser processes for --from-archive (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=10_000, help='records per COPY round trip')
+
+    def handle(self, *args, **options):
+        if options['from_archive']:
+            items = reparse(HtmlArchive(options['archive']), workers=options['processes'])
+        elif options['jsonl']:
+            items = read_jsonl(options['jsonl'])
+        else:
+            raise CommandError('Pass JSONL files or --from-archive')
+
+        copy_products(items, chunk_size=options['chunk_size'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from snapshot import DEFAULT_DUMP_DIR
+from snapshot import FORMATS
+from snapshot import export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Stream the catalog tables into one CSV or Parquet file per table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', nargs='?', default=DEFAULT_DUMP_DIR, help='output directory (default: dump/)')
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='file format')
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='rows per fetch and Parquet row group')
+
+    def handle(self, *args, **options):
+        try:
+            export_catalog(options['directory'], options['format'], options['chunk_size'])
+        except RuntimeError as e:
+            raise CommandError(e) from e
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from snapshot import DEFAULT_DUMP_DIR
+from snapshot import FORMATS
+from snapshot import import_catalog
+
+
+class Command(BaseCommand):
+    help = 'Restore the catalog tables from a directory written by export_catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', nargs='?', default=DEFAULT_DUMP_DIR, help='input directory (default: dump/)')
+        parser.add_argument('--format', choices=FORMATS, default='csv', help='file format')
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='empty the dumped tables, facet counts and page fingerprints before loading',
+        )
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='Parquet rows per COPY round trip')
+
+    def handle(self, *args, **options):
+        try:
+            import_catalog(options['directory'], options['format'], options['replace'], options['chunk_size'])
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(e) from e
@@ -0,0 +1,106 @@
+import datetime
+from collections.abc import Iterator
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+
+TABLE = 'price_observations'
+
+IS_PARTITIONED = f"SELECT relkind = 'p' FROM pg_class WHERE oid = '{TABLE}'::regclass"
+
+# NOT NULL constraints are copied by CREATE TABLE ... LIKE
+CONSTRAINTS = f"""
+SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+WHERE conrelid = '{TABLE}'::regclass AND contype IN ('c', 'f', 'p', 'u')
+"""
+
+# indexes backing a constraint come back with the constraint itself
+INDEXES = f"""
+SELECT i.indexname, i.indexdef FROM pg_indexes i
+WHERE i.schemaname = current_schema() AND i.tablename = '{TABLE}'
+AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname AND c.conrelid = '{TABLE}'::regclass)
+"""
+
+BOUNDS = f'SELECT min(observed_at), max(observed_at) FROM {TABLE}'
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_starts(first: datetime.date, last: datetime.date) -> Iterator[datetime.date]:
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def create_partition(cursor, month: datetime.date) -> None:
+    # bounds are UTC literals, DDL takes no bind parameters
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} '
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00+00')"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Convert price_observations to a table partitioned by month, or create the upcoming monthly partitions '
+        'of an already partitioned one (run it monthly, e.g. from cron).\n'
+        'The conversion copies every row under an ACCESS EXCLUSIVE lock, ingestion has to be stopped meanwhile. '
+        'Indexes and constraints are recreated under their old names, so later migrations of the model still '
+        'apply, but migrations never create partitions: keep --months-ahead ahead of the clock, rows outside '
+        'every monthly partition land in the default partition, and a month can not be added while the default '
+        'partition holds rows of it. Old months are dropped with DETACH PARTITION and DROP TABLE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='future monthly partitions to keep')
+
+    def handle(self, *args, **options):
+        today = datetime.datetime.now(datetime.UTC).date()
+        last = add_months(today.replace(day=1), options['months_ahead'])
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(IS_PARTITIONED)
+            if cursor.fetchone()[0]:
+                for month in month_starts(today, last):
+                    create_partition(cursor, month)
+                self.stdout.write(f'Partitions of {TABLE} exist up to {last:%Y-%m}')
+                return
+            self.convert(cursor, today, last)
+
+    def convert(self, cursor, today: datetime.date, last: datetime.date) -> None:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(CONSTRAINTS)
+        constraints = cursor.fetchall()
+        cursor.execute(INDEXES)
+        indexes = cursor.fetchall()
+        cursor.execute(BOUNDS)
+        first, latest = cursor.fetchone()
+
+        # the old table and its index names are moved aside, the new table takes over the originals
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_old')
+        for name, _ in constraints:
+            cursor.execute(f'ALTER TABLE {TABLE}_old RENAME CONSTRAINT {name} TO {name}_old')
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX {name} RENAME TO {name}_old')
+
+        cursor.execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_old INCLUDING DEFAULTS) PARTITION BY RANGE (observed_at)')
+        start = min(first.date(), today) if first else today
+        months = list(month_starts(start, max(latest.date(), last) if latest else last))
+        for month in months:
+            create_partition(cursor, month)
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+        # rows first, then keys and indexes: one build per partition instead of per-row maintenance
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_old')
+        rows = cursor.rowcount
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        cursor.execute(f'DROP TABLE {TABLE}_old')
+        cursor.execute(f'ANALYZE {TABLE}')
+        self.stdout.write(f'Moved {rows} observations into {len(months)} monthly partitions of {TABLE}')
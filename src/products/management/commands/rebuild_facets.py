@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.cache import invalidate_catalog
+from products.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount facet_counts from attribute_values'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            facets = rebuild_facet_counts()
+        invalidate_catalog()
+        self.stdout.write(f'Counted {facets} facets')
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Subquery
+
+
+def delete_duplicate_products(apps, schema_editor):
+    # products used to be matched on every column, so each price change left a new row behind;
+    # keep one row per code before the unique index is created. ids are random, so the survivor is the
+    # row with the most attribute values and images, with the lowest id breaking ties
+    Product = apps.get_model("products", "Product")
+    keeper = (
+        Product.objects.filter(code=OuterRef("code"))
+        .annotate(
+            num_values=Count("attributes", distinct=True),
+            num_images=Count("images", distinct=True),
+        )
+        .order_by("-num_values", "-num_images", "id")
+        .values("id")[:1]
+    )
+    Product.objects.annotate(keeper_id=Subquery(keeper)).exclude(id=F("keeper_id")).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_products, migrations.RunPython.noop),
+    ]
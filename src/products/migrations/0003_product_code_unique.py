@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_delete_duplicate_products"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="code",
+            field=models.CharField(unique=True),
+        ),
+    ]
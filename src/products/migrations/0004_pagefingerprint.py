@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_product_code_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("url", models.CharField(unique=True)),
+                ("etag", models.CharField(null=True)),
+                ("last_modified", models.CharField(null=True)),
+                ("data_hash", models.CharField(null=True)),
+                ("checked_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "page_fingerprints",
+            },
+        ),
+    ]
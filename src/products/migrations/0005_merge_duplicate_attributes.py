@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.models import Exists, F, OuterRef, Subquery
+
+
+def merge_duplicate_attributes(apps, schema_editor):
+    # groups and attributes used to be created by name without a constraint, so concurrent scrapers could
+    # create the same one twice; the lowest id survives and children are moved onto it
+    AttributeGroup = apps.get_model("products", "AttributeGroup")
+    Attribute = apps.get_model("products", "Attribute")
+    AttributeValue = apps.get_model("products", "AttributeValue")
+
+    first_group = AttributeGroup.objects.filter(name=OuterRef("name")).order_by("id").values("id")[:1]
+    duplicate_groups = (
+        AttributeGroup.objects.annotate(keeper_id=Subquery(first_group))
+        .exclude(id=F("keeper_id"))
+        .values_list("id", "keeper_id")
+    )
+    for group_id, keeper_id in duplicate_groups:
+        Attribute.objects.filter(group_id=group_id).update(group_id=keeper_id)
+        AttributeGroup.objects.filter(id=group_id).delete()
+
+    first_attribute = (
+        Attribute.objects.filter(group_id=OuterRef("group_id"), name=OuterRef("name")).order_by("id").values("id")[:1]
+    )
+    duplicate_attributes = (
+        Attribute.objects.annotate(keeper_id=Subquery(first_attribute))
+        .exclude(id=F("keeper_id"))
+        .values_list("id", "keeper_id")
+    )
+    for attribute_id, keeper_id in duplicate_attributes:
+        AttributeValue.objects.filter(attribute_id=attribute_id).update(attribute_id=keeper_id)
+        Attribute.objects.filter(id=attribute_id).delete()
+
+    older = AttributeValue.objects.filter(
+        product_id=OuterRef("product_id"), attribute_id=OuterRef("attribute_id"), id__lt=OuterRef("id")
+    )
+    AttributeValue.objects.filter(Exists(older)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_pagefingerprint"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_attributes, migrations.RunPython.noop),
+    ]
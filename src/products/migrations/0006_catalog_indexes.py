@@ -0,0 +1,63 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_merge_duplicate_attributes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attributegroup",
+            name="name",
+            field=models.CharField(unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name="attribute",
+            constraint=models.UniqueConstraint(fields=("group", "name"), name="attributes_group_name_uniq"),
+        ),
+        migrations.AddConstraint(
+            model_name="attributevalue",
+            constraint=models.UniqueConstraint(
+                fields=("product", "attribute"), name="attribute_values_product_attribute_uniq"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attributevalue",
+            index=models.Index(fields=["attribute", "value"], name="attr_values_attr_value_idx"),
+        ),
+        migrations.AlterField(
+            model_name="attribute",
+            name="group",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attributes",
+                to="products.attributegroup",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="attributevalue",
+            name="attribute",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="values",
+                to="products.attribute",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="attributevalue",
+            name="product",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attributes",
+                to="products.product",
+            ),
+        ),
+    ]
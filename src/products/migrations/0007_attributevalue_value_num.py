@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attributevalue",
+            name="value_num",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="attributevalue",
+            name="value_unit",
+            field=models.CharField(null=True),
+        ),
+    ]
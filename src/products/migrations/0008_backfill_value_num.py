@@ -0,0 +1,87 @@
+import re
+
+from django.db import migrations, models
+
+# a frozen copy of load_django.parse_value, the backfill must not change when the parser does
+NUMBER_WITH_UNIT = re.compile(r'^(?P<number>-?\d+(?:\.\d+)?)\s*(?P<unit>[^\W\d_]+|"|%)?$')
+
+UNITS = {
+    "gb": ("GB", 1),
+    "гб": ("GB", 1),
+    "tb": ("GB", 1024),
+    "тб": ("GB", 1024),
+    "mb": ("GB", 1 / 1024),
+    "мб": ("GB", 1 / 1024),
+    "hz": ("Hz", 1),
+    "гц": ("Hz", 1),
+    "khz": ("Hz", 1e3),
+    "кгц": ("Hz", 1e3),
+    "mhz": ("Hz", 1e6),
+    "мгц": ("Hz", 1e6),
+    "ghz": ("Hz", 1e9),
+    "ггц": ("Hz", 1e9),
+    "мм": ("mm", 1),
+    "mm": ("mm", 1),
+    "см": ("mm", 10),
+    "cm": ("mm", 10),
+    "г": ("g", 1),
+    "кг": ("g", 1000),
+    "kg": ("g", 1000),
+    '"': ("in", 1),
+    "дюйм": ("in", 1),
+    "mpx": ("Mpx", 1),
+    "мп": ("Mpx", 1),
+    "mp": ("Mpx", 1),
+    "mah": ("mAh", 1),
+    "мач": ("mAh", 1),
+    "вт": ("W", 1),
+    "w": ("W", 1),
+    "год": ("h", 1),
+    "h": ("h", 1),
+    "%": ("%", 1),
+}
+
+
+def parse_value(value):
+    if not (match := NUMBER_WITH_UNIT.match(value)):
+        return None, None
+    number = float(match["number"])
+    if not (unit := match["unit"]):
+        return number, None
+    if (known := UNITS.get(unit.lower())) is None:
+        return None, None
+    canonical, factor = known
+    return number * factor, canonical
+
+
+def backfill_value_num(apps, schema_editor):
+    AttributeValue = apps.get_model("products", "AttributeValue")
+    typed = []
+    for attribute_value in AttributeValue.objects.only("id", "value").iterator(chunk_size=5000):
+        attribute_value.value_num, attribute_value.value_unit = parse_value(attribute_value.value)
+        if attribute_value.value_num is not None:
+            typed.append(attribute_value)
+        if len(typed) >= 5000:
+            AttributeValue.objects.bulk_update(typed, ["value_num", "value_unit"])
+            typed.clear()
+    AttributeValue.objects.bulk_update(typed, ["value_num", "value_unit"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_attributevalue_value_num"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_value_num, migrations.RunPython.noop),
+        # built after the backfill, in one pass over the final data
+        migrations.AddIndex(
+            model_name="attributevalue",
+            index=models.Index(
+                condition=models.Q(("value_num__isnull", False)),
+                fields=["attribute", "value_num"],
+                name="attr_values_attr_num_idx",
+            ),
+        ),
+    ]
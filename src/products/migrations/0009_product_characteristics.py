@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+BACKFILL_CHARACTERISTICS = """
+UPDATE products p SET characteristics = c.characteristics
+FROM (
+    SELECT product_id, jsonb_object_agg(group_name, attrs) AS characteristics
+    FROM (
+        SELECT av.product_id, g.name AS group_name, jsonb_object_agg(a.name, av.value) AS attrs
+        FROM attribute_values av
+        JOIN attributes a ON a.id = av.attribute_id
+        JOIN attribute_groups g ON g.id = a.group_id
+        GROUP BY av.product_id, g.name
+    ) per_group
+    GROUP BY product_id
+) c
+WHERE c.product_id = p.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0008_backfill_value_num"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="characteristics",
+            field=models.JSONField(db_default={}, default=dict),
+        ),
+        migrations.RunSQL(BACKFILL_CHARACTERISTICS, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["characteristics"], name="products_chars_gin", opclasses=["jsonb_path_ops"]
+            ),
+        ),
+    ]
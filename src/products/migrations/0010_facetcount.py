@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:00
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COUNT_FACETS = """
+INSERT INTO facet_counts (id, attribute_id, value, count)
+SELECT gen_random_uuid(), attribute_id, value, count(*) FROM attribute_values GROUP BY attribute_id, value
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0009_product_characteristics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FacetCount",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("value", models.CharField()),
+                ("count", models.IntegerField()),
+                (
+                    "attribute",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="facets",
+                        to="products.attribute",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "facet_counts",
+                "constraints": [
+                    models.UniqueConstraint(fields=("attribute", "value"), name="facet_counts_attribute_value_uniq")
+                ],
+            },
+        ),
+        migrations.RunSQL(COUNT_FACETS, migrations.RunSQL.noop),
+    ]
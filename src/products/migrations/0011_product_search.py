@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+BACKFILL_SEARCH_VECTOR = """
+UPDATE products SET search_vector =
+    setweight(to_tsvector('simple', concat_ws(' ', title, code)), 'A')
+    || setweight(to_tsvector('simple', coalesce(manufacturer, '')), 'B')
+    || setweight(to_tsvector('simple', concat_ws(' ', color, ssd, resolution)), 'C')
+    || setweight(jsonb_to_tsvector('simple', characteristics, '["string"]'), 'D')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0010_facetcount"),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="products_search_gin"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("title", models.TextField())
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="products_title_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper(
+                        django.db.models.functions.comparison.Cast("code", models.TextField())
+                    ),
+                    name="gin_trgm_ops",
+                ),
+                name="products_code_trgm",
+            ),
+        ),
+    ]
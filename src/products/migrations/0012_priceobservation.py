@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:00
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+# the current prices become the first observation of every product
+RECORD_CURRENT_PRICES = """
+INSERT INTO price_observations (product_id, observed_at, price, promo_price)
+SELECT id, now(), price, promo_price FROM products
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0011_product_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceObservation",
+            fields=[
+                (
+                    "pk",
+                    models.CompositePrimaryKey(
+                        "product_id",
+                        "observed_at",
+                        blank=True,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "observed_at",
+                    models.DateTimeField(db_default=django.db.models.functions.datetime.Now()),
+                ),
+                ("price", models.IntegerField()),
+                ("promo_price", models.IntegerField(null=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_observations",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "price_observations",
+            },
+        ),
+        migrations.RunSQL(RECORD_CURRENT_PRICES, migrations.RunSQL.noop),
+        # built after the backfill, in one pass over the loaded rows
+        migrations.AddIndex(
+            model_name="priceobservation",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                autosummarize=True, fields=["observed_at"], name="price_obs_observed_brin"
+            ),
+        ),
+    ]
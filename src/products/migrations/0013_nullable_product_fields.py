@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0012_priceobservation"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="color",
+            field=models.CharField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="ssd",
+            field=models.CharField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="manufacturer",
+            field=models.CharField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="price",
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="resolution",
+            field=models.CharField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="priceobservation",
+            name="price",
+            field=models.IntegerField(null=True),
+        ),
+    ]
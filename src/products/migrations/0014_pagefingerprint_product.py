@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0013_nullable_product_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pagefingerprint",
+            name="product",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="fingerprints",
+                to="products.product",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+# values with a unit parse_value does not know ('5G') were stored as numbers before, they are text
+CLEAR_UNKNOWN_UNITS = """
+UPDATE attribute_values SET value_num = NULL, value_unit = NULL
+WHERE value_unit IS NOT NULL AND value_unit NOT IN ('GB', 'Hz', 'mm', 'g', 'in', 'Mpx', 'mAh', 'W', 'h', '%')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0014_pagefingerprint_product"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CLEAR_UNKNOWN_UNITS, migrations.RunSQL.noop),
+    ]
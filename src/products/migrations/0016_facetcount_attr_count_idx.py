@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0015_clear_unknown_value_units"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="facetcount",
+            index=models.Index(fields=["attribute", "-count", "value"], name="facet_counts_attr_count_idx"),
+        ),
+    ]
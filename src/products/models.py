@@ -1,26 +1,50 @@
 import uuid
 
+from django.contrib.postgres.indexes import BrinIndex
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Cast
+from django.db.models.functions import Now
+from django.db.models.functions import Upper
 
 
 class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField()
-    color = models.CharField()
-    ssd = models.CharField()
-    manufacturer = models.CharField()
-    price = models.IntegerField()
+    # read from characteristics, which most non-phone products lack
+    color = models.CharField(null=True)
+    ssd = models.CharField(null=True)
+    manufacturer = models.CharField(null=True)
+    # no price while the product is out of stock
+    price = models.IntegerField(null=True)
     promo_price = models.IntegerField(null=True)
-    code = models.CharField()
+    code = models.CharField(unique=True)
     num_reviews = models.IntegerField()
     screen_diagonal = models.FloatField()
-    resolution = models.CharField()
+    resolution = models.CharField(null=True)
+    # copy of ProductData.characteristics, {group: {attribute: value}}, so a product reads as one row
+    characteristics = models.JSONField(default=dict, db_default={})
+    # title, code, manufacturer and characteristics, written by products.search.update_search_vectors
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
 
     class Meta:
         db_table = 'products'
+        indexes = [
+            # jsonb_path_ops serves @> containment only, at a fraction of the size of the default opclass
+            GinIndex(fields=['characteristics'], name='products_chars_gin', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['search_vector'], name='products_search_gin'),
+            # the expression icontains compiles to, UPPER("title"::text) LIKE UPPER('%...%'), so admin search
+            # and fuzzy matching are trigram index scans
+            GinIndex(
+                OpClass(Upper(Cast('title', models.TextField())), name='gin_trgm_ops'), name='products_title_trgm'
+            ),
+            GinIndex(OpClass(Upper(Cast('code', models.TextField())), name='gin_trgm_ops'), name='products_code_trgm'),
+        ]
 
 
 class ProductImage(models.Model):
@@ -37,7 +61,7 @@ class ProductImage(models.Model):
 
 class AttributeGroup(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    name = models.CharField()
+    name = models.CharField(unique=True)
 
     def __str__(self):
         return self.name
@@ -48,7 +72,8 @@ class AttributeGroup(models.Model):
 
 class Attribute(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    group = models.ForeignKey(AttributeGroup, related_name='attributes', on_delete=models.CASCADE)
+    # the (group, name) constraint doubles as the index for lookups by group
+    group = models.ForeignKey(AttributeGroup, related_name='attributes', on_delete=models.CASCADE, db_index=False)
     name = models.CharField()
 
     def __str__(self):
@@ -56,16 +81,116 @@ class Attribute(models.Model):
 
     class Meta:
         db_table = 'attributes'
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'name'], name='attributes_group_name_uniq'),
+        ]
 
 
 class AttributeValue(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    attribute = models.ForeignKey(Attribute, related_name='values', on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, related_name='attributes', on_delete=models.CASCADE)
+    # covered by the composite indexes below, which lead with these columns
+    attribute = models.ForeignKey(Attribute, related_name='values', on_delete=models.CASCADE, db_index=False)
+    product = models.ForeignKey(Product, related_name='attributes', on_delete=models.CASCADE, db_index=False)
     value = models.CharField()
+    # numeric part of `value` in a canonical unit, so range filters run in Postgres ('256 Gb' -> 256, 'GB')
+    value_num = models.FloatField(null=True)
+    value_unit = models.CharField(null=True)
 
     def __str__(self):
         return '%s: %s' % (self.attribute.name, self.value)
 
     class Meta:
         db_table = 'attribute_values'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'attribute'], name='attribute_values_product_attribute_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['attribute', 'value'], name='attr_values_attr_value_idx'),
+            models.Index(
+                fields=['attribute', 'value_num'],
+                name='attr_values_attr_num_idx',
+                condition=models.Q(value_num__isnull=False),
+            ),
+        ]
+
+
+class FacetCount(models.Model):
+    """Number of products per (attribute, value), kept up to date by the ingestion path."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attribute = models.ForeignKey(Attribute, related_name='facets', on_delete=models.CASCADE, db_index=False)
+    value = models.CharField()
+    count = models.IntegerField()
+
+    def __str__(self):
+        return '%s: %s (%d)' % (self.attribute_id, self.value, self.count)
+
+    class Meta:
+        db_table = 'facet_counts'
+        constraints = [
+            models.UniqueConstraint(fields=['attribute', 'value'], name='facet_counts_attribute_value_uniq'),
+        ]
+        indexes = [
+            # the top values of one attribute are the first entries of this index
+            models.Index(fields=['attribute', '-count', 'value'], name='facet_counts_attr_count_idx'),
+        ]
+
+
+class PriceObservationQuerySet(models.QuerySet):
+    def latest_per_product(self, at=None):
+        """One row per product, its price as of `at` (now by default): DISTINCT ON over the primary key index.
+
+        Narrow the queryset to the products of interest first, the current price is in products.price anyway.
+        """
+        observations = self if at is None else self.filter(observed_at__lte=at)
+        return observations.order_by('product_id', '-observed_at').distinct('product_id')
+
+    def series(self, product, since=None, until=None):
+        """Price changes of one product in time order, a range scan of the primary key index."""
+        observations = self.filter(product=product)
+        if since is not None:
+            observations = observations.filter(observed_at__gte=since)
+        if until is not None:
+            observations = observations.filter(observed_at__lt=until)
+        return observations.order_by('observed_at')
+
+
+class PriceObservation(models.Model):
+    """Append-only price history, a row is written only when the price or the promo price of a product changes."""
+
+    # (product, observed_at) serves the per-product lookups and contains the partition key, see
+    # the partition_price_observations command
+    pk = models.CompositePrimaryKey('product_id', 'observed_at')
+    product = models.ForeignKey(Product, related_name='price_observations', on_delete=models.CASCADE, db_index=False)
+    observed_at = models.DateTimeField(db_default=Now())
+    price = models.IntegerField(null=True)
+    promo_price = models.IntegerField(null=True)
+
+    objects = PriceObservationQuerySet.as_manager()
+
+    def __str__(self):
+        return '%s: %s at %s' % (self.product_id, self.price, self.observed_at)
+
+    class Meta:
+        db_table = 'price_observations'
+        indexes = [
+            # rows arrive in time order, a BRIN index of a few pages answers time range scans over all products
+            BrinIndex(fields=['observed_at'], name='price_obs_observed_brin', autosummarize=True),
+        ]
+
+
+class PageFingerprint(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    url = models.CharField(unique=True)
+    # null only for fingerprints written before the link existed, those are not trusted until the page is saved again
+    product = models.ForeignKey(Product, related_name='fingerprints', on_delete=models.CASCADE, null=True)
+    etag = models.CharField(null=True)
+    last_modified = models.CharField(null=True)
+    data_hash = models.CharField(null=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+    class Meta:
+        db_table = 'page_fingerprints'
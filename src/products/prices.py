@@ -0,0 +1,47 @@
+import uuid
+from collections.abc import Mapping
+
+from django.db import connection
+
+# one timestamp per call, so a product has at most one observation per transaction
+RECORD_PRICES = """
+INSERT INTO price_observations (product_id, observed_at, price, promo_price)
+SELECT p.product_id, now(), p.price, p.promo_price
+FROM unnest(%s::uuid[], %s::integer[], %s::integer[]) AS p (product_id, price, promo_price)
+ON CONFLICT DO NOTHING
+"""
+
+# products without any observation yet, e.g. loaded from a dump, start their history at their current price
+RECORD_INITIAL_PRICES = """
+INSERT INTO price_observations (product_id, observed_at, price, promo_price)
+SELECT p.id, now(), p.price, p.promo_price FROM products p
+WHERE NOT EXISTS (SELECT 1 FROM price_observations o WHERE o.product_id = p.id)
+"""
+
+
+def record_prices(prices: Mapping[uuid.UUID, tuple[int | None, int | None]]) -> None:
+    """Append {product id: (price, promo_price)} to price_observations, in the caller's transaction.
+
+    Callers pass only the products whose price differs from the stored one, or that were just created.
+    """
+    if not prices:
+        return
+    product_ids = list(prices)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            RECORD_PRICES,
+            [product_ids, [prices[pk][0] for pk in product_ids], [prices[pk][1] for pk in product_ids]],
+        )
+
+
+def record_initial_prices() -> int:
+    """Record the current price of every product that has no observation, in the caller's transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute(RECORD_INITIAL_PRICES)
+        return cursor.rowcount
+
+
+__all__ = [
+    'record_initial_prices',
+    'record_prices',
+]
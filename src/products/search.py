@@ -0,0 +1,27 @@
+import uuid
+from collections.abc import Iterable
+
+from django.db import connection
+
+# 'simple' keeps words as they are: Postgres ships no Ukrainian stemmer and codes must not be stemmed anyway
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', concat_ws(' ', title, code)), 'A')
+    || setweight(to_tsvector('simple', coalesce(manufacturer, '')), 'B')
+    || setweight(to_tsvector('simple', concat_ws(' ', color, ssd, resolution)), 'C')
+    || setweight(jsonb_to_tsvector('simple', characteristics, '["string"]'), 'D')
+"""
+
+UPDATE_SEARCH_VECTORS = f'UPDATE products SET search_vector = {SEARCH_VECTOR} WHERE id = ANY(%s::uuid[])'
+
+
+def update_search_vectors(product_ids: Iterable[uuid.UUID]) -> None:
+    """Recompute search_vector of the given products with one set-based UPDATE."""
+    if product_ids := list(product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(UPDATE_SEARCH_VECTORS, [product_ids])
+
+
+__all__ = [
+    'update_search_vectors',
+    'SEARCH_VECTOR',
+]
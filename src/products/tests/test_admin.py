@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from load_django import ProductData
+from load_django import attribute_cache
+from load_django import write_batch
+from products.models import AttributeValue
+from products.models import FacetCount
+from products.models import Product
+
+
+def phone(code: str, **characteristics: str) -> ProductData:
+    return ProductData(title=f'Phone {code}', code=code, price=1000, characteristics={'Інші': characteristics})
+
+
+class ProductAdminTests(TestCase):
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        write_batch(
+            [
+                phone('A', Колір='чорний', Виробник='Apple'),
+                phone('B', Колір='чорний', Виробник='Samsung'),
+                phone('C', Колір='синій'),
+            ],
+            {},
+        )
+
+    def facets(self) -> dict[tuple[str, str], int]:
+        return {
+            (attribute, value): count
+            for attribute, value, count in FacetCount.objects.values_list('attribute__name', 'value', 'count')
+        }
+
+    def test_delete_view_uncounts_facets(self):
+        product = Product.objects.get(code='A')
+        response = self.client.post(reverse('admin:products_product_delete', args=[product.pk]), {'post': 'yes'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 1, ('Колір', 'синій'): 1, ('Виробник', 'Samsung'): 1})
+
+    def test_delete_action_uncounts_facets(self):
+        selected = Product.objects.filter(code__in=['A', 'C']).values_list('pk', flat=True)
+        response = self.client.post(
+            reverse('admin:products_product_changelist'),
+            {'action': 'delete_selected', '_selected_action': [str(pk) for pk in selected], 'post': 'yes'},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 1, ('Виробник', 'Samsung'): 1})
+
+    def test_values_are_read_only(self):
+        value = AttributeValue.objects.filter(product__code='C').get()
+        url = reverse('admin:products_attributevalue_change', args=[value.pk])
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.post(url, {'product': value.product_id, 'attribute': value.attribute_id, 'value': 'червоний'})
+        value.refresh_from_db()
+        self.assertEqual(value.value, 'синій')
+        self.assertEqual(self.client.get(reverse('admin:products_attributevalue_add')).status_code, 403)
@@ -0,0 +1,61 @@
+import gzip
+import hashlib
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from archive import HtmlArchive
+from archive import reparse
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class HtmlArchiveTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = HtmlArchive(directory.name)
+
+    def test_put_and_get(self):
+        html_doc = '<html><body><h1>Мобільний телефон</h1></body></html>'
+        digest = self.archive.put('https://brain.com.ua/ukr/a.html', html_doc)
+
+        self.assertEqual(digest, hashlib.sha256(html_doc.encode('utf-8')).hexdigest())
+        path = self.archive.blob_path(digest)
+        self.assertEqual(path, self.archive.root / 'blobs' / digest[:2] / f'{digest[2:]}.html.gz')
+        self.assertEqual(gzip.decompress(path.read_bytes()).decode('utf-8'), html_doc)
+        self.assertEqual(self.archive.get(digest), html_doc)
+
+    def test_same_content_is_stored_once(self):
+        first = self.archive.put('https://brain.com.ua/ukr/a.html', '<html>same</html>')
+        second = self.archive.put('https://brain.com.ua/ukr/b.html', '<html>same</html>')
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(list(self.archive.blobs.rglob('*.html.gz'))), 1)
+        # no temporary files are left behind
+        self.assertEqual(list(self.archive.blobs.rglob('*.tmp')), [])
+
+    def test_latest(self):
+        self.assertEqual(self.archive.latest(), {})
+
+        old = self.archive.put('https://brain.com.ua/ukr/a.html', '<html>v1</html>')
+        new = self.archive.put('https://brain.com.ua/ukr/a.html', '<html>v2</html>')
+        other = self.archive.put('https://brain.com.ua/ukr/b.html', '<html>v1</html>')
+
+        self.assertEqual(old, other)
+        self.assertEqual(
+            self.archive.latest(), {'https://brain.com.ua/ukr/a.html': new, 'https://brain.com.ua/ukr/b.html': old}
+        )
+        # every fetch stays in the index, older pages remain readable
+        self.assertEqual(len(self.archive.index_path.read_text(encoding='utf-8').splitlines()), 3)
+        self.assertEqual(self.archive.get(old), '<html>v1</html>')
+
+    def test_reparse(self):
+        url = 'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_15_128GB_Black-p1044347.html'
+        self.archive.put(url, '<html><body><h1>old</h1></body></html>')
+        self.archive.put(url, (FIXTURES / 'product.html').read_text(encoding='utf-8'))
+
+        [product] = reparse(self.archive, workers=1)
+        self.assertEqual(product.url, url)
+        self.assertEqual(product.code, 'U0854689')
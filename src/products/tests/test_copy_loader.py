@@ -0,0 +1,101 @@
+from django.test import SimpleTestCase
+from django.test import TransactionTestCase
+from django.test import override_settings
+
+from copy_loader import copy_products
+from copy_loader import copy_text
+from load_django import ProductData
+from load_django import attribute_cache
+from products.models import AttributeValue
+from products.models import FacetCount
+from products.models import PageFingerprint
+from products.models import PriceObservation
+from products.models import Product
+from products.models import ProductImage
+
+# copy_products clears the whole cache, keep it off the file cache of the settings
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def phone(code: str, title: str | None = None, price: int = 1000, **characteristics: str) -> ProductData:
+    return ProductData(
+        title=title or f'Phone {code}',
+        code=code,
+        price=price,
+        images=[f'https://brain.com.ua/static/images/{code}.jpg'],
+        characteristics={'Інші': characteristics},
+        url=f'https://brain.com.ua/ukr/{code}.html',
+    )
+
+
+class CopyTextTests(SimpleTestCase):
+    def test_escapes(self):
+        self.assertEqual(copy_text(None), '\\N')
+        self.assertEqual(copy_text('a\tb\nc\rd'), 'a\\tb\\nc\\rd')
+        # a backslash is escaped first, so a literal \N stays text
+        self.assertEqual(copy_text('C:\\N'), 'C:\\\\N')
+        self.assertEqual(copy_text(6.1), '6.1')
+
+
+# the staging tables are dropped on commit, which a TestCase never reaches
+@override_settings(CACHES=LOCAL_CACHE)
+class CopyProductsTests(TransactionTestCase):
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+
+    def snapshot(self) -> dict[str, list]:
+        return {
+            'products': sorted(Product.objects.values_list('code', 'title', 'price', 'characteristics')),
+            'images': sorted(ProductImage.objects.values_list('product__code', 'url')),
+            'values': sorted(AttributeValue.objects.values_list('product__code', 'attribute__name', 'value')),
+            'facets': sorted(FacetCount.objects.values_list('attribute__name', 'value', 'count')),
+            'prices': sorted(PriceObservation.objects.values_list('product__code', 'price')),
+            'fingerprints': sorted(PageFingerprint.objects.values_list('url', 'product__code')),
+        }
+
+    def test_special_characters_round_trip(self):
+        title = 'Кабель "USB\tType-C"\nC:\\N\\path\r'
+        copy_products([phone('A', title, Примітка='tab\there, \\N, new\nline')])
+
+        product = Product.objects.get(code='A')
+        self.assertEqual(product.title, title)
+        self.assertEqual(product.characteristics, {'Інші': {'Примітка': 'tab\there, \\N, new\nline'}})
+        self.assertEqual(AttributeValue.objects.get(product=product).value, 'tab\there, \\N, new\nline')
+        self.assertIsNone(product.color)
+
+    def test_last_record_of_a_code_wins(self):
+        stats = copy_products(
+            [phone('A', 'Old title', Колір='чорний'), phone('B', Колір='чорний'), phone('A', 'New title', price=900)]
+        )
+
+        self.assertEqual(stats.products, 2)
+        self.assertEqual(Product.objects.get(code='A').title, 'New title')
+        # nothing of the replaced record is kept
+        self.assertEqual(self.snapshot()['values'], [('B', 'Колір', 'чорний')])
+        self.assertEqual(self.snapshot()['prices'], [('A', 900), ('B', 1000)])
+
+    def test_skips_records_without_required_fields(self):
+        stats = copy_products([phone('A'), ProductData(title='No code'), ProductData(code='B', price=1000)])
+
+        self.assertEqual(stats.skipped, 2)
+        self.assertEqual(list(Product.objects.values_list('code', flat=True)), ['A'])
+
+    def test_rerun_is_idempotent(self):
+        batch = [phone('A', Колір='чорний', Виробник='Apple'), phone('B', Колір='синій')]
+        copy_products(batch)
+        first = self.snapshot()
+
+        stats = copy_products(batch)
+        self.assertEqual((stats.churn.inserted, stats.churn.updated, stats.churn.deleted), (0, 0, 0))
+        self.assertEqual(self.snapshot(), first)
+
+    def test_rerun_applies_changes(self):
+        copy_products([phone('A', Колір='чорний', Виробник='Apple'), phone('B', Колір='чорний')])
+        stats = copy_products([phone('A', price=900, Колір='синій')])
+
+        self.assertEqual((stats.churn.inserted, stats.churn.updated, stats.churn.deleted), (0, 1, 1))
+        snapshot = self.snapshot()
+        self.assertEqual(snapshot['values'], [('A', 'Колір', 'синій'), ('B', 'Колір', 'чорний')])
+        self.assertEqual(snapshot['facets'], [('Колір', 'синій', 1), ('Колір', 'чорний', 1)])
+        self.assertEqual(snapshot['prices'], [('A', 900), ('A', 1000), ('B', 1000)])
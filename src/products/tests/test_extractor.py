@@ -0,0 +1,88 @@
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from extractor import extract_listing
+from extractor import extract_product
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class ExtractProductTests(SimpleTestCase):
+    def test_product_page(self):
+        product = extract_product((FIXTURES / 'product.html').read_bytes())
+
+        self.assertEqual(product.title, 'Мобільний телефон Apple iPhone 15 128GB Black (MTP03)')
+        self.assertEqual(product.code, 'U0854689')
+        self.assertEqual((product.price, product.promo_price), (35499, 33999))
+        self.assertEqual(product.num_reviews, 12)
+        self.assertEqual(
+            product.images,
+            [
+                'https://brain.com.ua/static/images/prod_img/8/9/U0854689_big.jpg',
+                'https://brain.com.ua/static/images/prod_img/9/0/U0854690_2_1739047988.jpg',
+            ],
+        )
+        # promoted characteristics
+        self.assertEqual(product.color, 'чорний')
+        self.assertEqual(product.ssd, '128 Gb')
+        self.assertEqual(product.manufacturer, 'Apple')
+        self.assertEqual(product.screen_diagonal, 6.1)
+        self.assertEqual(product.resolution, '1179х2556')
+
+    def test_characteristics_are_cleaned(self):
+        characteristics = extract_product((FIXTURES / 'product.html').read_bytes()).characteristics
+
+        self.assertEqual(list(characteristics), ['Дисплей', "Функції пам'яті", 'Фізичні характеристики', 'Інші'])
+        self.assertEqual(characteristics['Дисплей']['Частота оновлення екрану'], '60 Гц')
+        self.assertEqual(characteristics["Функції пам'яті"]["Вбудована пам'ять"], '128 Gb')
+        self.assertEqual(characteristics['Інші']['Бездротові інтерфейси'], 'Bluetooth, WI-FI, NFC')
+
+    def test_missing_blocks(self):
+        # a non-phone product: no price, reviews or characteristics that map to columns
+        product = extract_product(
+            '<html><body><div data-section="top"><h1>USB кабель</h1>'
+            '<div id="product_code"><span class="br-pr-code-val">U0000001</span></div></div></body></html>'
+        )
+
+        self.assertEqual((product.title, product.code), ('USB кабель', 'U0000001'))
+        self.assertIsNone(product.price)
+        self.assertIsNone(product.promo_price)
+        self.assertIsNone(product.color)
+        self.assertIsNone(product.resolution)
+        self.assertEqual(product.num_reviews, 0)
+        self.assertEqual(product.screen_diagonal, 0.0)
+        self.assertEqual(product.images, [])
+        self.assertEqual(product.characteristics, {})
+
+    def test_page_without_product(self):
+        product = extract_product('<html><body><h1>Смартфони</h1></body></html>')
+        self.assertIsNone(product.code)
+        self.assertIsNone(product.title)
+
+
+class ExtractListingTests(SimpleTestCase):
+    base_url = 'https://brain.com.ua/ukr/category/Mobilni_telefoni-c1274-128/'
+
+    def test_cards(self):
+        items = extract_listing((FIXTURES / 'listing.html').read_bytes(), self.base_url)
+
+        self.assertEqual(len(items), 3)
+        phone, sold_out, banner = items
+        self.assertEqual(phone.code, 'U0854689')
+        self.assertEqual(phone.title, 'Мобільний телефон Apple iPhone 15 128GB Black (MTP03)')
+        self.assertEqual((phone.price, phone.promo_price, phone.num_reviews), (35499, 33999, 12))
+        # absolute, without tracking parameters and fragments
+        self.assertEqual(
+            phone.url, 'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_15_128GB_Black-p1044347.html'
+        )
+
+        self.assertEqual(sold_out.code, 'U0961530')
+        self.assertIsNone(sold_out.price)
+        self.assertIsNone(sold_out.num_reviews)
+
+        self.assertIsNone(banner.code)
+        self.assertIsNone(banner.price)
+
+    def test_page_without_cards(self):
+        self.assertEqual(extract_listing((FIXTURES / 'product.html').read_bytes(), self.base_url), [])
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from django.test import SimpleTestCase
+
+from extractor import extract_product
+from fetcher import Fetcher
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+ETAG = '"u0854689-v1"'
+LAST_MODIFIED = 'Sat, 17 Oct 2026 09:00:00 GMT'
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves saved pages from fixtures/ and a few scripted failures."""
+
+    hits: Counter[str] = Counter()
+
+    def do_GET(self):
+        hits = self.hits[self.path] = self.hits[self.path] + 1
+        if self.path == '/product.html':
+            if self.headers.get('If-None-Match') == ETAG:
+                return self.reply(304)
+            return self.reply(200, (FIXTURES / 'product.html').read_bytes(), {'ETag': ETAG})
+        if self.path == '/dated.html':
+            if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                return self.reply(304)
+            return self.reply(200, (FIXTURES / 'product.html').read_bytes(), {'Last-Modified': LAST_MODIFIED})
+        if self.path == '/flaky.html':
+            # two server errors, then the page
+            if hits <= 2:
+                return self.reply(503)
+            return self.reply(200, (FIXTURES / 'product.html').read_bytes())
+        if self.path == '/broken.html':
+            return self.reply(500)
+        if self.path == '/busy.html':
+            # asks for a day's pause before every retry
+            return self.reply(503, headers={'Retry-After': '86400'})
+        return self.reply(404)
+
+    def reply(self, status: int, body: bytes = b'', headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetcherTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FixtureHandler.hits.clear()
+        # no backoff, retries happen immediately
+        self.fetcher = Fetcher(headers={}, workers=4, per_host=2, timeout=(2.0, 5.0), retries=3, backoff=0)
+        self.addCleanup(self.fetcher.close)
+
+    def test_fetch_all_and_extract(self):
+        urls = [f'{self.base_url}/product.html', f'{self.base_url}/missing.html']
+        results = {result.url: result for result in self.fetcher.fetch_all(urls)}
+
+        page = results[urls[0]]
+        self.assertTrue(page.ok)
+        self.assertEqual(page.etag, ETAG)
+        product = extract_product(page.text)
+        self.assertEqual(product.code, 'U0854689')
+        self.assertEqual(product.title, 'Мобільний телефон Apple iPhone 15 128GB Black (MTP03)')
+        self.assertEqual((product.price, product.promo_price), (35499, 33999))
+
+        self.assertEqual(results[urls[1]].status, 404)
+        self.assertFalse(results[urls[1]].ok)
+        # a 404 is final, it is not retried
+        self.assertEqual(FixtureHandler.hits['/missing.html'], 1)
+
+    def test_retries_server_errors(self):
+        result = self.fetcher.fetch(f'{self.base_url}/flaky.html')
+        self.assertTrue(result.ok)
+        self.assertEqual(FixtureHandler.hits['/flaky.html'], 3)
+
+    def test_gives_up_after_retries(self):
+        result = self.fetcher.fetch(f'{self.base_url}/broken.html')
+        self.assertEqual(result.status, 500)
+        self.assertFalse(result.ok)
+        self.assertEqual(FixtureHandler.hits['/broken.html'], 4)
+
+    def test_not_modified(self):
+        url = f'{self.base_url}/product.html'
+        [result] = self.fetcher.fetch_all([url], {url: (ETAG, None)})
+        self.assertTrue(result.not_modified)
+        self.assertFalse(result.ok)
+
+        [result] = self.fetcher.fetch_all([url], {url: ('"stale"', None)})
+        self.assertTrue(result.ok)
+
+    def test_not_modified_since(self):
+        url = f'{self.base_url}/dated.html'
+        [result] = self.fetcher.fetch_all([url])
+        self.assertTrue(result.ok)
+        self.assertEqual(result.last_modified, LAST_MODIFIED)
+
+        # the stored validators of load_fingerprints, (etag, last_modified)
+        [result] = self.fetcher.fetch_all([url], {url: (None, result.last_modified)})
+        self.assertTrue(result.not_modified)
+
+    def test_backoff_grows_per_attempt(self):
+        fetcher = Fetcher(headers={}, backoff=1.0)
+        self.addCleanup(fetcher.close)
+        for attempt in range(3):
+            self.assertGreaterEqual(fetcher._delay(attempt), 2**attempt)
+            self.assertLessEqual(fetcher._delay(attempt), 2**attempt + 1)
+
+    def test_retry_after_is_capped(self):
+        fetcher = Fetcher(headers={}, backoff=1.0, max_backoff=5.0)
+        self.addCleanup(fetcher.close)
+        for value, expected in [('2', 2.0), ('0', 0.0), ('86400', 5.0), (formatdate(time.time() + 86400), 5.0)]:
+            with self.subTest(value=value):
+                response = requests.Response()
+                response.headers['Retry-After'] = value
+                self.assertEqual(fetcher._delay(0, response), expected)
+
+    def test_busy_server_does_not_stall_a_worker(self):
+        fetcher = Fetcher(headers={}, retries=2, max_backoff=0.01)
+        self.addCleanup(fetcher.close)
+        result = fetcher.fetch(f'{self.base_url}/busy.html')
+        self.assertEqual(result.status, 503)
+        self.assertEqual(FixtureHandler.hits['/busy.html'], 3)
@@ -0,0 +1,98 @@
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from extractor import extract_listing_links
+from frontier import DONE
+from frontier import FAILED
+from frontier import IN_PROGRESS
+from frontier import LISTING
+from frontier import PENDING
+from frontier import PRODUCT
+from frontier import Frontier
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+class FrontierTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'frontier.sqlite3'
+        self.frontier = self.open()
+
+    def open(self) -> Frontier:
+        frontier = Frontier(self.path, max_attempts=2)
+        self.addCleanup(frontier.close)
+        return frontier
+
+    def test_add_deduplicates(self):
+        self.assertEqual(self.frontier.add(['/a', '/b', '/a'], PRODUCT), 2)
+        self.assertEqual(self.frontier.add(['/a'], PRODUCT), 0)
+        self.assertEqual(self.frontier.counts(), {(PRODUCT, PENDING): 2})
+
+    def test_claim_by_kind_and_priority(self):
+        self.frontier.add(['/low'], PRODUCT, priority=0)
+        self.frontier.add(['/high'], PRODUCT, priority=5)
+        self.frontier.add(['/listing'], LISTING, priority=10)
+
+        self.assertEqual(self.frontier.claim(PRODUCT, 1), ['/high'])
+        self.assertEqual(self.frontier.claim(PRODUCT, 10), ['/low'])
+        # claimed urls are not handed out twice
+        self.assertEqual(self.frontier.claim(PRODUCT, 10), [])
+        self.assertEqual(self.frontier.counts()[(PRODUCT, IN_PROGRESS)], 2)
+
+    def test_failed_until_out_of_attempts(self):
+        self.frontier.add(['/flaky'], PRODUCT)
+
+        self.frontier.failed(self.frontier.claim(PRODUCT, 1))
+        self.assertEqual(self.frontier.counts(), {(PRODUCT, PENDING): 1})
+        self.frontier.failed(self.frontier.claim(PRODUCT, 1))
+        self.assertEqual(self.frontier.counts(), {(PRODUCT, FAILED): 1})
+        self.assertEqual(self.frontier.claim(PRODUCT, 1), [])
+
+    def test_requeue(self):
+        self.frontier.add(['/product'], PRODUCT)
+        self.frontier.add(['/listing'], LISTING)
+        self.frontier.done(self.frontier.claim(PRODUCT, 1) + self.frontier.claim(LISTING, 1))
+
+        self.assertEqual(self.frontier.requeue(LISTING), 1)
+        self.assertEqual(self.frontier.counts(), {(LISTING, PENDING): 1, (PRODUCT, DONE): 1})
+        # finished urls come back only with requeue=True
+        self.assertEqual(self.frontier.add(['/product'], PRODUCT), 0)
+        self.assertEqual(self.frontier.add(['/product'], PRODUCT, requeue=True), 1)
+        self.assertEqual(self.frontier.claim(PRODUCT, 1), ['/product'])
+
+    def test_crash_recovery(self):
+        self.frontier.add(['/a', '/b'], PRODUCT)
+        self.frontier.done(self.frontier.claim(PRODUCT, 1))
+        self.frontier.claim(PRODUCT, 1)
+        # the process dies without finishing the second url
+        self.frontier.close()
+
+        reopened = self.open()
+        self.assertEqual(reopened.counts(), {(PRODUCT, DONE): 1, (PRODUCT, PENDING): 1})
+        self.assertEqual(len(reopened.claim(PRODUCT, 10)), 1)
+
+
+class ListingLinksTests(SimpleTestCase):
+    def test_listing_links(self):
+        base_url = 'https://brain.com.ua/ukr/category/Mobilni_telefoni-c1274-128/'
+        product_urls, listing_urls = extract_listing_links((FIXTURES / 'listing.html').read_bytes(), base_url)
+
+        self.assertEqual(
+            product_urls,
+            [
+                'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_15_128GB_Black-p1044347.html',
+                'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_16_Pro_Max_256GB_Black_Titanium-p1145453.html',
+            ],
+        )
+        # the current page, javascript links and duplicates are left out
+        self.assertEqual(
+            listing_urls,
+            [
+                'https://brain.com.ua/ukr/category/Mobilni_telefoni-c1274-128/page=2/',
+                'https://brain.com.ua/ukr/category/Mobilni_telefoni-c1274-128/page=3/',
+            ],
+        )
@@ -0,0 +1,202 @@
+import uuid
+
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from load_django import AttributeCache
+from load_django import Fingerprint
+from load_django import ListingData
+from load_django import ProductData
+from load_django import attribute_cache
+from load_django import load_fingerprints
+from load_django import parse_value
+from load_django import product_hash
+from load_django import update_listing_prices
+from load_django import write_batch
+from products.models import AttributeValue
+from products.models import FacetCount
+from products.models import PageFingerprint
+from products.models import Product
+
+
+class AttributeCacheTests(SimpleTestCase):
+    def test_get_and_update(self):
+        cache = AttributeCache()
+        group_id, attribute_id = uuid.uuid4(), uuid.uuid4()
+        self.assertIsNone(cache.get('Дисплей', 'Діагональ екрану'))
+
+        cache.update({'Дисплей': group_id}, {('Дисплей', 'Діагональ екрану'): attribute_id})
+        self.assertEqual(cache.get_group('Дисплей'), group_id)
+        self.assertEqual(cache.get('Дисплей', 'Діагональ екрану'), attribute_id)
+        self.assertEqual(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = AttributeCache(maxsize=2)
+        ids = {name: uuid.uuid4() for name in 'abc'}
+        cache.update({}, {('g', 'a'): ids['a'], ('g', 'b'): ids['b']})
+        # reading 'a' makes 'b' the oldest entry
+        cache.get('g', 'a')
+        cache.update({}, {('g', 'c'): ids['c']})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('g', 'b'))
+        self.assertEqual(cache.get('g', 'a'), ids['a'])
+        self.assertEqual(cache.get('g', 'c'), ids['c'])
+
+    def test_invalidate(self):
+        cache = AttributeCache()
+        cache.update({'g': uuid.uuid4()}, {('g', 'a'): uuid.uuid4()})
+        cache.warmed = True
+
+        cache.invalidate()
+        self.assertIsNone(cache.get_group('g'))
+        self.assertIsNone(cache.get('g', 'a'))
+        self.assertEqual(len(cache), 0)
+        self.assertFalse(cache.warmed)
+
+
+class ParseValueTests(SimpleTestCase):
+    def test_canonical_units(self):
+        self.assertEqual(parse_value('256 Gb'), (256, 'GB'))
+        self.assertEqual(parse_value('1 Tb'), (1024, 'GB'))
+        self.assertEqual(parse_value('512 Мб'), (0.5, 'GB'))
+        self.assertEqual(parse_value('120 Гц'), (120, 'Hz'))
+        self.assertEqual(parse_value('6.1"'), (6.1, 'in'))
+        self.assertEqual(parse_value('0.2 кг'), (200, 'g'))
+
+    def test_plain_numbers(self):
+        self.assertEqual(parse_value('12'), (12, None))
+        self.assertEqual(parse_value('-20'), (-20, None))
+
+    def test_text(self):
+        for value in ['Bluetooth, WI-FI, NFC', '1179х2556', 'USB Type-C', '6.1" 120 Гц', '']:
+            with self.subTest(value=value):
+                self.assertEqual(parse_value(value), (None, None))
+
+    def test_unknown_units_are_text(self):
+        # '5G' is a network, 'g' is not read as grams
+        self.assertEqual(parse_value('5G'), (None, None))
+        self.assertEqual(parse_value('3 шт'), (None, None))
+
+
+def phone(code: str, **characteristics: str) -> ProductData:
+    return ProductData(
+        title=f'Phone {code}',
+        code=code,
+        price=1000,
+        images=[f'https://brain.com.ua/static/images/{code}.jpg'],
+        characteristics={'Інші': characteristics},
+    )
+
+
+class SyncValuesTests(TestCase):
+    def setUp(self):
+        # ids cached by an earlier test point at rows its transaction rolled back
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+
+    def facets(self) -> dict[tuple[str, str], int]:
+        return {
+            (attribute, value): count
+            for attribute, value, count in FacetCount.objects.values_list('attribute__name', 'value', 'count')
+        }
+
+    def values(self, code: str) -> dict[str, str]:
+        return dict(AttributeValue.objects.filter(product__code=code).values_list('attribute__name', 'value'))
+
+    def test_new_products_are_counted(self):
+        write_batch([phone('A', Колір='чорний', Виробник='Apple'), phone('B', Колір='чорний')], {})
+
+        self.assertEqual(self.values('A'), {'Колір': 'чорний', 'Виробник': 'Apple'})
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 2, ('Виробник', 'Apple'): 1})
+
+    def test_changed_value_moves_its_count(self):
+        write_batch([phone('A', Колір='чорний'), phone('B', Колір='чорний')], {})
+        stats = write_batch([phone('A', Колір='синій')], {})
+
+        self.assertEqual((stats.churn.inserted, stats.churn.updated, stats.churn.deleted), (0, 1, 0))
+        self.assertEqual(self.values('A'), {'Колір': 'синій'})
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 1, ('Колір', 'синій'): 1})
+
+    def test_removed_value_drops_empty_facets(self):
+        write_batch([phone('A', Колір='чорний', Виробник='Apple')], {})
+        stats = write_batch([phone('A', Колір='чорний')], {})
+
+        self.assertEqual(stats.churn.deleted, 1)
+        self.assertEqual(self.values('A'), {'Колір': 'чорний'})
+        # a facet no product carries anymore is deleted, not kept at zero
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 1})
+
+    def test_same_values_change_nothing(self):
+        write_batch([phone('A', Колір='чорний')], {})
+        stats = write_batch([phone('A', Колір='чорний')], {})
+
+        self.assertEqual(stats.churn.rows, 0)
+        self.assertEqual(self.facets(), {('Колір', 'чорний'): 1})
+
+
+class ListingPriceTests(TestCase):
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+
+    def test_listing_price_does_not_hide_product_page(self):
+        page = phone('A', Колір='чорний')
+        page.url, page.price = 'https://brain.com.ua/ukr/a.html', 35499
+        write_batch([page], {page.url: Fingerprint(etag='"v1"')})
+
+        self.assertEqual(update_listing_prices([ListingData(code='A', title=page.title, price=30000)]), [])
+        self.assertEqual(Product.objects.get(code='A').price, 30000)
+        # the page itself has not changed, but the row no longer matches it
+        self.assertEqual(load_fingerprints([page.url]), {})
+
+        stats = write_batch([page], load_fingerprints([page.url]))
+        self.assertEqual((stats.products, stats.unchanged), (1, 0))
+        self.assertEqual(Product.objects.get(code='A').price, 35499)
+
+
+class FingerprintTests(TestCase):
+    url = 'https://brain.com.ua/ukr/a.html'
+
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+        self.page = phone('A', Колір='чорний')
+        self.page.url = self.url
+
+    def test_validators_are_stored(self):
+        write_batch([self.page], {self.url: Fingerprint('"v1"', 'Sat, 17 Oct 2026 09:00:00 GMT')})
+
+        self.assertEqual(
+            load_fingerprints([self.url, 'https://brain.com.ua/ukr/b.html']),
+            {self.url: Fingerprint('"v1"', 'Sat, 17 Oct 2026 09:00:00 GMT', product_hash(self.page))},
+        )
+
+    def test_unchanged_page_is_skipped(self):
+        write_batch([self.page], {self.url: Fingerprint('"v1"')})
+
+        stats = write_batch([self.page], {self.url: Fingerprint('"v2"')})
+        self.assertEqual((stats.products, stats.unchanged), (0, 1))
+        # the new validators are kept even though the product was not written
+        self.assertEqual(load_fingerprints([self.url])[self.url].etag, '"v2"')
+
+        self.page.price = 900
+        stats = write_batch([self.page], {})
+        self.assertEqual((stats.products, stats.unchanged), (1, 0))
+        self.assertEqual(Product.objects.get(code='A').price, 900)
+
+    def test_deleted_product_is_written_again(self):
+        write_batch([self.page], {self.url: Fingerprint('"v1"')})
+        Product.objects.filter(code='A').delete()
+
+        self.assertEqual(load_fingerprints([self.url]), {})
+        self.assertEqual(write_batch([self.page], {}).products, 1)
+        self.assertTrue(Product.objects.filter(code='A').exists())
+
+    def test_fingerprint_without_product_is_ignored(self):
+        # written before fingerprints were linked to their product
+        PageFingerprint.objects.create(url=self.url, etag='"v1"', data_hash=product_hash(self.page))
+
+        self.assertEqual(load_fingerprints([self.url]), {})
+        self.assertEqual(write_batch([self.page], {}).products, 1)
+        self.assertEqual(PageFingerprint.objects.get(url=self.url).product, Product.objects.get(code='A'))
@@ -0,0 +1,118 @@
+import itertools
+import threading
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+
+from django.test import TransactionTestCase
+
+from load_django import attribute_cache
+from pipeline import FetchedPage
+from pipeline import Pipeline
+from products.models import Product
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+PRODUCT_URL = 'https://brain.com.ua/ukr/Mobilniy_telefon_Apple_iPhone_15_128GB_Black-p1044347.html'
+
+
+class FixtureBackend:
+    """Hands out the saved product page for every job, optionally failing after `fail_after` pages."""
+
+    def __init__(self, fail_after: int | None = None) -> None:
+        self.fail_after = fail_after
+        self.html = (FIXTURES / 'product.html').read_text(encoding='utf-8')
+
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]:
+        for n, job in enumerate(jobs):
+            if n == self.fail_after:
+                raise ConnectionError('browser crashed')
+            # an empty document fails to parse
+            yield FetchedPage(job, '' if job.endswith('broken') else self.html)
+
+
+class StalledBackend(FixtureBackend):
+    """Hands out two pages, then waits for `resume` before the next, like a browser stuck on a slow page."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.resume = threading.Event()
+
+    def pages(self, jobs: Iterable[str]) -> Iterator[FetchedPage]:
+        for n, page in enumerate(super().pages(jobs)):
+            if n == 2:
+                self.resume.wait()
+            yield page
+
+
+class FailingWriterPipeline(Pipeline):
+    def _drain(self) -> Iterator:
+        yield from itertools.islice(super()._drain(), 1)
+        raise RuntimeError('database is gone')
+
+
+# the writer retires connections between batches, which would close the one a TestCase runs in
+class PipelineTests(TransactionTestCase):
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+
+    def stage_threads(self) -> list[threading.Thread]:
+        return [thread for thread in threading.enumerate() if thread.name in ('fetch', 'parse')]
+
+    def assertStagesStop(self):
+        for thread in self.stage_threads():
+            thread.join(timeout=10)
+        self.assertEqual(self.stage_threads(), [])
+
+    def test_pages_are_parsed_and_written(self):
+        pipeline = Pipeline(FixtureBackend(), parse_workers=1, report_every=60)
+        stats = pipeline.run([PRODUCT_URL, f'{PRODUCT_URL}#again'])
+
+        # both pages are the same product, deduplicated by code in the batch
+        self.assertEqual(stats.products, 1)
+        self.assertEqual(Product.objects.get(code='U0854689').price, 35499)
+        self.assertEqual([m.items for m in pipeline.metrics.values()], [2, 2, 2])
+        self.assertStagesStop()
+
+    def test_parse_errors_are_counted(self):
+        pipeline = Pipeline(FixtureBackend(), parse_workers=1, report_every=60)
+        stats = pipeline.run(['https://brain.com.ua/ukr/broken', PRODUCT_URL])
+
+        self.assertEqual(stats.products, 1)
+        self.assertEqual((pipeline.metrics['parse'].items, pipeline.metrics['parse'].errors), (1, 1))
+        self.assertStagesStop()
+
+    def test_fetch_error_ends_the_run(self):
+        pipeline = Pipeline(FixtureBackend(fail_after=1), parse_workers=1, report_every=60)
+        stats = pipeline.run([PRODUCT_URL, f'{PRODUCT_URL}#never'])
+
+        # what was fetched before the failure is still written
+        self.assertEqual(stats.products, 1)
+        self.assertEqual((pipeline.metrics['fetch'].items, pipeline.metrics['fetch'].errors), (1, 1))
+        self.assertStagesStop()
+
+    def test_writer_error_stops_the_stages(self):
+        pipeline = FailingWriterPipeline(FixtureBackend(), parse_workers=1, queue_size=2, report_every=60)
+        # far more pages than the queues hold, fetch and parse are blocked on full queues when the writer fails
+        jobs = (f'{PRODUCT_URL}#{n}' for n in range(10_000))
+
+        with self.assertRaisesMessage(RuntimeError, 'database is gone'):
+            pipeline.run(jobs)
+        self.assertStagesStop()
+
+    def test_writer_error_stops_an_idle_parse_stage(self):
+        backend = StalledBackend()
+        self.addCleanup(backend.resume.set)
+        pipeline = FailingWriterPipeline(backend, parse_workers=1, report_every=60)
+
+        with self.assertRaisesMessage(RuntimeError, 'database is gone'):
+            pipeline.run([PRODUCT_URL, f'{PRODUCT_URL}#2', f'{PRODUCT_URL}#stalled'])
+        # the parse stage stops while the fetch stage is still waiting for its page
+        for thread in self.stage_threads():
+            if thread.name == 'parse':
+                thread.join(timeout=10)
+                self.assertFalse(thread.is_alive())
+
+        backend.resume.set()
+        self.assertStagesStop()
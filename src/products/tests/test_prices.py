@@ -0,0 +1,96 @@
+from datetime import UTC
+from datetime import datetime
+
+from django.db import transaction
+from django.test import TestCase
+from django.test import TransactionTestCase
+
+from load_django import ProductData
+from load_django import attribute_cache
+from load_django import write_batch
+from products.models import PriceObservation
+from products.models import Product
+from products.prices import record_prices
+
+
+def phone(code: str, price: int | None, promo_price: int | None = None) -> ProductData:
+    return ProductData(title=f'Phone {code}', code=code, price=price, promo_price=promo_price)
+
+
+def at(day: int) -> datetime:
+    return datetime(2026, 1, day, tzinfo=UTC)
+
+
+class RecordPricesTests(TransactionTestCase):
+    # every write_batch commits, so each one observes at its own now()
+    def setUp(self):
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+
+    def history(self, code: str) -> list[tuple[int | None, int | None]]:
+        return list(
+            PriceObservation.objects.filter(product__code=code)
+            .order_by('observed_at')
+            .values_list('price', 'promo_price')
+        )
+
+    def test_only_changes_are_recorded(self):
+        write_batch([phone('A', 1000), phone('B', 500)], {})
+        write_batch([phone('A', 1000), phone('B', 500, 450)], {})
+        write_batch([phone('A', None), phone('B', 500, 450)], {})
+
+        self.assertEqual(self.history('A'), [(1000, None), (None, None)])
+        self.assertEqual(self.history('B'), [(500, None), (500, 450)])
+
+    def test_one_observation_per_transaction(self):
+        product = Product.objects.create(title='Phone A', code='A', num_reviews=0, screen_diagonal=0.0)
+        with transaction.atomic():
+            record_prices({product.id: (1000, None)})
+            # same now(), ON CONFLICT DO NOTHING keeps the first
+            record_prices({product.id: (900, None)})
+        record_prices({})
+
+        self.assertEqual(self.history('A'), [(1000, None)])
+
+
+class PriceObservationQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b = (
+            Product.objects.create(title=f'Phone {code}', code=code, num_reviews=0, screen_diagonal=0.0)
+            for code in 'AB'
+        )
+        PriceObservation.objects.bulk_create(
+            [
+                PriceObservation(product=cls.a, observed_at=at(1), price=1000),
+                PriceObservation(product=cls.a, observed_at=at(5), price=900),
+                PriceObservation(product=cls.a, observed_at=at(9), price=950, promo_price=899),
+                PriceObservation(product=cls.b, observed_at=at(3), price=500),
+            ]
+        )
+
+    def test_latest_per_product(self):
+        latest = PriceObservation.objects.latest_per_product()
+        self.assertEqual(
+            sorted(latest.values_list('product__code', 'price', 'promo_price')), [('A', 950, 899), ('B', 500, None)]
+        )
+
+    def test_latest_per_product_at(self):
+        self.assertEqual(
+            sorted(PriceObservation.objects.latest_per_product(at(5)).values_list('product__code', 'price')),
+            [('A', 900), ('B', 500)],
+        )
+        # B has no observation yet on the 2nd
+        self.assertEqual(
+            list(PriceObservation.objects.latest_per_product(at(2)).values_list('product__code', 'price')),
+            [('A', 1000)],
+        )
+
+    def test_series(self):
+        series = PriceObservation.objects.series(self.a)
+        self.assertEqual(list(series.values_list('price', flat=True)), [1000, 900, 950])
+
+        # since is inclusive, until exclusive
+        series = PriceObservation.objects.series(self.a, since=at(5), until=at(9))
+        self.assertEqual(list(series.values_list('observed_at', 'price')), [(at(5), 900)])
+        self.assertEqual(PriceObservation.objects.series(self.b, since=at(4)).count(), 0)
@@ -0,0 +1,162 @@
+import uuid
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from load_django import ProductData
+from load_django import attribute_cache
+from load_django import write_batch
+from products.models import Attribute
+from products.views import MAX_FACET_ATTRIBUTES
+
+# the file cache of the settings would outlive the rolled back rows of each test
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def phone(code: str, price: int = 1000, **characteristics: str) -> ProductData:
+    return ProductData(
+        title=f'Phone {code}',
+        code=code,
+        price=price,
+        images=[f'https://brain.com.ua/static/images/{code}.jpg'],
+        characteristics={'Інші': characteristics},
+    )
+
+
+class FacetListTests(SimpleTestCase):
+    def test_requires_attributes(self):
+        response = self.client.get(reverse('products:facets'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_caps_attributes(self):
+        attributes = [str(uuid.uuid4()) for _ in range(MAX_FACET_ATTRIBUTES + 1)]
+        response = self.client.get(reverse('products:facets'), {'attribute': attributes})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_malformed_filters(self):
+        response = self.client.get(reverse('products:facets'), {'attribute': str(uuid.uuid4()), 'filter': 'color'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ProductApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+        write_batch(
+            [
+                phone('A', Колір='чорний'),
+                phone('B', Колір='синій'),
+                phone('C', Колір='чорний'),
+                phone('D', Колір='чорний'),
+                phone('E', Колір='синій'),
+            ],
+            {},
+        )
+
+    def codes(self, response) -> list[str]:
+        return [product['code'] for product in response.json()['results']]
+
+    def test_keyset_pages(self):
+        url, pages = f'{reverse("products:list")}?limit=2', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.codes(response))
+            url = response.json()['next']
+
+        self.assertEqual(pages, [['A', 'B'], ['C', 'D'], ['E']])
+
+    def test_next_keeps_filters(self):
+        color = Attribute.objects.get(name='Колір')
+        response = self.client.get(reverse('products:list'), {'limit': 1, 'filter': f'{color.id}:чорний'})
+        self.assertEqual(self.codes(response), ['A'])
+        next_url = urlsplit(response.json()['next'])
+        self.assertEqual(next_url.path, reverse('products:list'))
+        self.assertEqual(parse_qs(next_url.query), {'after': ['A'], 'limit': ['1'], 'filter': [f'{color.id}:чорний']})
+
+        self.assertEqual(self.codes(self.client.get(response.json()['next'])), ['C'])
+
+    def test_detail(self):
+        response = self.client.get(reverse('products:detail', args=['A']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['images'], ['https://brain.com.ua/static/images/A.jpg'])
+        self.assertEqual(response.json()['characteristics'], {'Інші': {'Колір': 'чорний'}})
+
+    def test_missing_product_is_json(self):
+        response = self.client.get(reverse('products:detail', args=['Z']))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'error': 'no product with code Z'})
+
+    def test_responses_are_cached(self):
+        for url in [reverse('products:list'), reverse('products:detail', args=['A'])]:
+            with self.subTest(url=url):
+                expected = self.client.get(url).json()
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.client.get(url).json(), expected)
+
+    def test_writes_invalidate_cache(self):
+        self.client.get(reverse('products:detail', args=['A']))
+        self.client.get(reverse('products:list'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            write_batch([phone('A', price=900, Колір='чорний')], {})
+
+        self.assertEqual(self.client.get(reverse('products:detail', args=['A'])).json()['price'], 900)
+        self.assertEqual(self.client.get(reverse('products:list')).json()['results'][0]['price'], 900)
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        attribute_cache.invalidate()
+        self.addCleanup(attribute_cache.invalidate)
+        products = [
+            ProductData(
+                title='Мобільний телефон Apple iPhone 15 128GB Black',
+                code='U0854689',
+                manufacturer='Apple',
+                characteristics={'Інші': {'Колір': 'чорний'}},
+            ),
+            ProductData(
+                title='Мобільний телефон Samsung Galaxy S24 8/256GB Onyx Black',
+                code='U0961530',
+                manufacturer='Samsung',
+                characteristics={'Інші': {'Колір': 'чорний', 'Сумісність': 'Apple CarPlay'}},
+            ),
+            ProductData(title='Чохол для Samsung Galaxy S24', code='U0970001', manufacturer='Spigen'),
+        ]
+        write_batch(products, {})
+
+    def search(self, q: str) -> tuple[str, list[str]]:
+        response = self.client.get(reverse('products:search'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['mode'], [product['code'] for product in response.json()['results']]
+
+    def test_requires_query(self):
+        self.assertEqual(self.client.get(reverse('products:search'), {'q': ' '}).status_code, 400)
+
+    def test_fulltext_ranks_title_above_characteristics(self):
+        # Apple is in the first product's title and manufacturer, in a characteristic of the second
+        self.assertEqual(self.search('apple'), ('fulltext', ['U0854689', 'U0961530']))
+
+    def test_fulltext_search_syntax(self):
+        self.assertEqual(self.search('galaxy -чохол'), ('fulltext', ['U0961530']))
+        self.assertEqual(self.search('"galaxy s24" spigen'), ('fulltext', ['U0970001']))
+        self.assertEqual(self.search('u0854689'), ('fulltext', ['U0854689']))
+
+    def test_fuzzy_fallback(self):
+        # a typo and a partial code have no full-text hit
+        self.assertEqual(self.search('Samsnug Galaxy S24 256GB Onyx Black'), ('fuzzy', ['U0961530']))
+        self.assertEqual(self.search('U085468'), ('fuzzy', ['U0854689']))
+
+    def test_no_match(self):
+        self.assertEqual(self.search('холодильник'), ('fuzzy', []))
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from products import views
+
+app_name = 'products'
+
+urlpatterns = [
+    path('products/', views.product_list, name='list'),
+    path('products/search/', views.product_search, name='search'),
+    path('products/<str:code>/', views.product_detail, name='detail'),
+    path('facets/', views.facet_list, name='facets'),
+]
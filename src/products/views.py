@@ -1,3 +1,232 @@
-from django.shortcuts import render
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode
 
-# Create your views here.
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models import TextField
+from django.db.models import Window
+from django.db.models.functions import Cast
+from django.db.models.functions import Greatest
+from django.db.models.functions import RowNumber
+from django.db.models.functions import Upper
+from django.http import HttpRequest
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from products.cache import list_key
+from products.cache import product_key
+from products.models import Attribute
+from products.models import AttributeValue
+from products.models import FacetCount
+from products.models import Product
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_FACET_VALUES = 20
+MAX_FACET_ATTRIBUTES = 20
+DEFAULT_SEARCH_RESULTS = 20
+
+
+def serialize_product(product: Product) -> dict:
+    return {
+        'id': str(product.id),
+        'code': product.code,
+        'title': product.title,
+        'color': product.color,
+        'ssd': product.ssd,
+        'manufacturer': product.manufacturer,
+        'price': product.price,
+        'promo_price': product.promo_price,
+        'num_reviews': product.num_reviews,
+        'screen_diagonal': product.screen_diagonal,
+        'resolution': product.resolution,
+        'images': [image.url for image in product.images.all()],
+        'characteristics': product.characteristics,
+    }
+
+
+def page_size(request: HttpRequest, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        return min(max(int(request.GET.get('limit', default)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return default
+
+
+def parse_filters(request: HttpRequest) -> dict[uuid.UUID, list[str]]:
+    """Read repeated `filter=<attribute_id>:<value>` parameters into {attribute_id: [values]}."""
+    filters: dict[uuid.UUID, list[str]] = defaultdict(list)
+    for item in request.GET.getlist('filter'):
+        attribute_id, _, value = item.partition(':')
+        filters[uuid.UUID(attribute_id)].append(value)
+    return {attribute_id: sorted(values) for attribute_id, values in sorted(filters.items())}
+
+
+def filter_products(queryset: QuerySet[Product], filters: dict[uuid.UUID, list[str]]) -> QuerySet[Product]:
+    # values of one attribute are alternatives, different attributes must all match;
+    # every condition is a probe of the (attribute_id, value) index
+    for attribute_id, values in filters.items():
+        queryset = queryset.filter(
+            id__in=AttributeValue.objects.filter(attribute_id=attribute_id, value__in=values).values('product_id')
+        )
+    return queryset
+
+
+def top_values(rows: QuerySet, limit: int) -> QuerySet:
+    ranked = rows.annotate(rank=Window(RowNumber(), partition_by=F('attribute_id'), order_by=F('count').desc()))
+    return ranked.filter(rank__lte=limit).values_list('attribute_id', 'value', 'count')
+
+
+def top_facet_counts(attribute_ids: list[uuid.UUID], limit: int) -> list[tuple[uuid.UUID, str, int]]:
+    # UNION ALL of one LIMIT query per attribute, each reads `limit` entries of the (attribute_id, count DESC) index
+    # however many values the attribute has
+    parts = [
+        FacetCount.objects.filter(attribute_id=attribute_id)
+        .order_by('-count', 'value')
+        .values_list('attribute_id', 'value', 'count')[:limit]
+        for attribute_id in attribute_ids
+    ]
+    return list(parts[0].union(*parts[1:], all=True))
+
+
+@require_GET
+def product_list(request: HttpRequest) -> JsonResponse:
+    """Products ordered by code, one page after the `after` cursor.
+
+    Keyset pagination walks the unique code index, so page 10 000 costs the same as page 1.
+    """
+    after = request.GET.get('after', '')
+    limit = page_size(request)
+    try:
+        filters = parse_filters(request)
+    except ValueError:
+        return JsonResponse({'error': 'filter must be <attribute_id>:<value>'}, status=400)
+
+    key = list_key('list', after, limit, filters)
+    if (body := cache.get(key)) is None:
+        # images come in one extra query per page, characteristics are a column of the product row
+        queryset = filter_products(Product.objects.filter(code__gt=after), filters)
+        queryset = queryset.order_by('code').prefetch_related('images')
+        products = list(queryset[: limit + 1])
+        body = {
+            'results': [serialize_product(product) for product in products[:limit]],
+            'next': products[limit - 1].code if len(products) > limit else None,
+        }
+        cache.set(key, body)
+    if body['next']:
+        query = {'after': body['next'], 'limit': limit, 'filter': request.GET.getlist('filter')}
+        body = {**body, 'next': f'{reverse("products:list")}?{urlencode(query, doseq=True)}'}
+    return JsonResponse(body)
+
+
+@require_GET
+def product_detail(request: HttpRequest, code: str) -> JsonResponse:
+    key = product_key(code)
+    if (body := cache.get(key)) is None:
+        try:
+            product = Product.objects.prefetch_related('images').get(code=code)
+        except Product.DoesNotExist:
+            return JsonResponse({'error': f'no product with code {code}'}, status=404)
+        body = serialize_product(product)
+        cache.set(key, body)
+    return JsonResponse(body)
+
+
+@require_GET
+def facet_list(request: HttpRequest) -> JsonResponse:
+    """Most common values of the chosen `attribute`s with product counts, optionally within `filter`.
+
+    Without filters the counts are precomputed in facet_counts and read from its index. With filters they are counted
+    live over the matching products, restricted to the requested attributes, at most MAX_FACET_ATTRIBUTES of them:
+    cheap for selective filters, proportional to the matching products for broad ones.
+    """
+    limit = page_size(request, DEFAULT_FACET_VALUES)
+    try:
+        filters = parse_filters(request)
+        attribute_ids = sorted({uuid.UUID(attribute_id) for attribute_id in request.GET.getlist('attribute')})
+    except ValueError:
+        return JsonResponse({'error': 'filter must be <attribute_id>:<value>, attribute an attribute id'}, status=400)
+    if not 0 < len(attribute_ids) <= MAX_FACET_ATTRIBUTES:
+        return JsonResponse({'error': f'pass 1 to {MAX_FACET_ATTRIBUTES} attribute ids as attribute'}, status=400)
+
+    key = list_key('facets', limit, filters, attribute_ids)
+    if (body := cache.get(key)) is not None:
+        return JsonResponse(body)
+
+    if filters:
+        matching = filter_products(Product.objects.all(), filters)
+        rows = AttributeValue.objects.filter(product_id__in=matching.values('id'), attribute_id__in=attribute_ids)
+        counts = list(top_values(rows.values('attribute_id', 'value').annotate(count=Count('id')), limit))
+        total = matching.count()
+    else:
+        counts = top_facet_counts(attribute_ids, limit)
+        total = None
+
+    facets: dict[uuid.UUID, list[dict]] = defaultdict(list)
+    for attribute_id, value, count in counts:
+        facets[attribute_id].append({'value': value, 'count': count})
+    attributes = Attribute.objects.select_related('group').in_bulk(list(facets))
+
+    body = {
+        'total': total,
+        'facets': [
+            {
+                'attribute_id': str(attribute_id),
+                'group': attributes[attribute_id].group.name,
+                'name': attributes[attribute_id].name,
+                'values': sorted(values, key=lambda item: -item['count']),
+            }
+            for attribute_id, values in facets.items()
+            if attribute_id in attributes
+        ],
+    }
+    cache.set(key, body)
+    return JsonResponse(body)
+
+
+@require_GET
+def product_search(request: HttpRequest) -> JsonResponse:
+    """Full-text search over title, code, manufacturer and characteristics, falling back to fuzzy title matching.
+
+    `q` takes web search syntax ("quoted phrases", -excluded words, or); a query without full-text hits is matched
+    by trigram similarity, which forgives typos and partial codes.
+    """
+    if not (q := request.GET.get('q', '').strip()):
+        return JsonResponse({'error': 'q is required'}, status=400)
+    limit = page_size(request, DEFAULT_SEARCH_RESULTS)
+
+    key = list_key('search', q, limit)
+    if (body := cache.get(key)) is not None:
+        return JsonResponse(body)
+
+    query = SearchQuery(q, config='simple', search_type='websearch')
+    products = list(
+        Product.objects.filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', 'code')
+        .prefetch_related('images')[:limit]
+    )
+    mode = 'fulltext'
+    if not products:
+        # same expressions as the trigram indexes, so the % operator is an index scan
+        title = Upper(Cast('title', TextField()))
+        code = Upper(Cast('code', TextField()))
+        products = list(
+            Product.objects.alias(title_upper=title, code_upper=code)
+            .filter(Q(title_upper__trigram_similar=q.upper()) | Q(code_upper__trigram_similar=q.upper()))
+            .annotate(similarity=Greatest(TrigramSimilarity(title, q.upper()), TrigramSimilarity(code, q.upper())))
+            .order_by('-similarity', 'code')
+            .prefetch_related('images')[:limit]
+        )
+        mode = 'fuzzy'
+
+    body = {'query': q, 'mode': mode, 'results': [serialize_product(product) for product in products]}
+    cache.set(key, body)
+    return JsonResponse(body)
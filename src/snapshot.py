@@ -0,0 +1,244 @@
+import csv
+import os
+from pathlib import Path
+
+from copy_loader import copy_from
+from copy_loader import copy_rows
+from copy_loader import copy_to
+from load_django import attribute_cache
+from load_django import parse_value
+from load_django import setup_django
+
+DEFAULT_DUMP_DIR = os.environ.get(
+    'DUMP_DIR', os.path.normpath(os.path.join(os.path.dirname(__file__), os.pardir, 'dump'))
+)
+
+# parents before children, so a restore never references a row that is not there yet
+TABLES = ['attribute_groups', 'attributes', 'products', 'product_images', 'attribute_values', 'price_observations']
+
+# not dumped: facet counts are recounted after a restore, fingerprints are written again by the next crawl
+DERIVED_TABLES = ['facet_counts', 'page_fingerprints']
+
+FORMATS = ['csv', 'parquet']
+
+# dump files are binary and always UTF-8, whatever the client encoding of the connection
+CSV_OPTIONS = "FORMAT csv, HEADER true, ENCODING 'UTF8'"
+
+# products.characteristics mirrors the attribute tables, dumps taken before it existed get it rebuilt from them
+REBUILD_CHARACTERISTICS = """
+UPDATE products p SET characteristics = c.characteristics
+FROM (
+    SELECT product_id, jsonb_object_agg(group_name, attrs) AS characteristics
+    FROM (
+        SELECT av.product_id, g.name AS group_name, jsonb_object_agg(a.name, av.value) AS attrs
+        FROM attribute_values av
+        JOIN attributes a ON a.id = av.attribute_id
+        JOIN attribute_groups g ON g.id = a.group_id
+        GROUP BY av.product_id, g.name
+    ) per_group
+    GROUP BY product_id
+) c
+WHERE c.product_id = p.id
+"""
+
+TABLE_COLUMNS = """
+SELECT column_name, data_type FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+ORDER BY ordinal_position
+"""
+
+
+def table_columns(cursor, table: str) -> dict[str, str]:
+    """Return {column: data type} in physical order, the order of the CSV headers in dump/.
+
+    Generated columns are left out, the database recomputes them on restore.
+    """
+    cursor.execute(TABLE_COLUMNS, [table])
+    return dict(cursor.fetchall())
+
+
+def arrow_schema(columns: dict[str, str]):
+    import pyarrow as pa
+
+    types = {
+        'smallint': pa.int16(),
+        'integer': pa.int32(),
+        'bigint': pa.int64(),
+        'real': pa.float32(),
+        'double precision': pa.float64(),
+        'boolean': pa.bool_(),
+        'date': pa.date32(),
+        'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+        'timestamp without time zone': pa.timestamp('us'),
+    }
+    # uuid, varchar, jsonb, tsvector and numeric keep their text representation
+    return pa.schema([(name, types.get(data_type, pa.string())) for name, data_type in columns.items()])
+
+
+def as_text(values: tuple) -> list[str | None]:
+    # uuid and numeric columns come back as UUID and Decimal objects
+    return [None if value is None else str(value) for value in values]
+
+
+def require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError('The parquet format needs pyarrow: pip install pyarrow') from None
+
+
+def export_table(connection, table: str, path: Path, fmt: str, chunk_size: int) -> int:
+    with connection.cursor() as cursor:
+        columns = table_columns(cursor, table)
+        select = f'SELECT {", ".join(columns)} FROM {table}'
+        if fmt == 'csv':
+            # COPY streams straight from the server into the file, rows never become Python objects;
+            # binary, because psycopg 3 hands out chunks that may split a UTF-8 character
+            with open(path, 'wb') as f:
+                copy_to(cursor, f'COPY ({select}) TO STDOUT WITH ({CSV_OPTIONS})', f)
+            return cursor.rowcount
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(columns)
+    rows = 0
+    # a named (server-side) cursor holds at most `chunk_size` rows in memory, each chunk becomes one row group
+    with connection.chunked_cursor() as cursor, pq.ParquetWriter(path, schema) as writer:
+        cursor.execute(select)
+        while chunk := cursor.fetchmany(chunk_size):
+            arrays = [
+                pa.array(as_text(values) if field.type == pa.string() else values, type=field.type)
+                for values, field in zip(zip(*chunk), schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+def export_catalog(directory: str | Path = DEFAULT_DUMP_DIR, fmt: str = 'csv', chunk_size: int = 50_000) -> None:
+    """Write every catalog table to <directory>/<table>.<fmt> from one consistent snapshot."""
+    setup_django()
+
+    from django.db import connection
+    from django.db import transaction
+
+    if fmt == 'parquet':
+        require_pyarrow()
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # all tables are read from the same snapshot, children never point at rows missing from the dump
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        for table in TABLES:
+            rows = export_table(connection, table, directory / f'{table}.{fmt}', fmt, chunk_size)
+            print(f'Exported {rows} rows of {table}')
+
+
+def file_columns(path: Path, fmt: str) -> list[str]:
+    if fmt == 'csv':
+        with open(path, encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), [])
+
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).schema_arrow.names
+
+
+def fill_value_numbers(chunk_size: int) -> int:
+    """Derive value_num/value_unit for attribute values loaded from a dump that predates those columns."""
+    from products.models import AttributeValue
+
+    typed: list[AttributeValue] = []
+    filled = 0
+    for attribute_value in AttributeValue.objects.only('id', 'value').iterator(chunk_size=chunk_size):
+        attribute_value.value_num, attribute_value.value_unit = parse_value(attribute_value.value)
+        if attribute_value.value_num is not None:
+            typed.append(attribute_value)
+        if len(typed) >= chunk_size:
+            filled += AttributeValue.objects.bulk_update(typed, ['value_num', 'value_unit'])
+            typed.clear()
+    return filled + AttributeValue.objects.bulk_update(typed, ['value_num', 'value_unit'])
+
+
+def import_table(cursor, table: str, path: Path, fmt: str, chunk_size: int) -> int:
+    known = table_columns(cursor, table)
+    columns = file_columns(path, fmt)
+    if unknown := [name for name in columns if name not in known]:
+        raise ValueError(f'{path.name} has columns that {table} does not: {", ".join(unknown)}')
+
+    # only the columns present in the file are loaded, columns added since the dump keep their defaults
+    if fmt == 'csv':
+        with open(path, 'rb') as f:
+            copy_from(cursor, f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH ({CSV_OPTIONS})', f)
+        return cursor.rowcount
+
+    import pyarrow.parquet as pq
+
+    rows = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        copy_rows(cursor, table, columns, zip(*(column.to_pylist() for column in batch.columns)))
+        rows += batch.num_rows
+    return rows
+
+
+def import_catalog(
+    directory: str | Path = DEFAULT_DUMP_DIR, fmt: str = 'csv', replace: bool = False, chunk_size: int = 50_000
+) -> None:
+    """Load <directory>/<table>.<fmt> files back with COPY, all tables in one transaction.
+
+    With `replace` the dumped tables and DERIVED_TABLES are emptied first, price history included: restore it from
+    a dump that has price_observations, older ones start every product's history over at its current price.
+    """
+    setup_django()
+
+    from django.db import connection
+    from django.db import transaction
+
+    from products.cache import invalidate_catalog
+    from products.facets import rebuild_facet_counts
+    from products.prices import record_initial_prices
+    from products.search import SEARCH_VECTOR
+
+    if fmt == 'parquet':
+        require_pyarrow()
+
+    directory = Path(directory)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if replace:
+            # no CASCADE, a table that references the catalog and is not listed here fails the restore instead of
+            # being emptied; fingerprints of the replaced products would make the next crawl skip their pages
+            cursor.execute(f'TRUNCATE {", ".join(TABLES + DERIVED_TABLES)}')
+        for table in TABLES:
+            if not (path := directory / f'{table}.{fmt}').exists():
+                print(f'Skipped {table}, {path} does not exist')
+                continue
+            rows = import_table(cursor, table, path, fmt, chunk_size)
+            print(f'Imported {rows} rows into {table}')
+            if table == 'attribute_values' and 'value_num' not in file_columns(path, fmt):
+                print(f'Parsed numbers of {fill_value_numbers(chunk_size)} attribute values')
+
+        products_path = directory / f'products.{fmt}'
+        if products_path.exists() and 'characteristics' not in file_columns(products_path, fmt):
+            cursor.execute(REBUILD_CHARACTERISTICS)
+            print(f'Rebuilt characteristics of {cursor.rowcount} products')
+        if products_path.exists() and 'search_vector' not in file_columns(products_path, fmt):
+            cursor.execute(f'UPDATE products SET search_vector = {SEARCH_VECTOR}')
+            print(f'Indexed {cursor.rowcount} products for search')
+        print(f'Recounted {rebuild_facet_counts()} facets')
+        print(f'Recorded the first price of {record_initial_prices()} products')
+
+    # cached attribute ids and API responses may point at rows that were just replaced
+    attribute_cache.invalidate()
+    invalidate_catalog()
+
+
+__all__ = [
+    'export_catalog',
+    'import_catalog',
+    'DEFAULT_DUMP_DIR',
+    'FORMATS',
+    'TABLES',
+]